@@ -1,11 +1,41 @@
-from fastapi import FastAPI, HTTPException, Request, Form
+from fastapi import FastAPI, HTTPException, Request, Form, Query, Body
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from bisect import bisect_right, insort
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import json
+import os
+import sqlite3
+import time
 
-app = FastAPI()
+# Storage configuration: TASK_STORAGE is one of "memory", "log" or "sqlite"
+TASK_STORAGE = os.environ.get("TASK_STORAGE", "log")
+TASK_STORAGE_PATH = os.environ.get("TASK_STORAGE_PATH")
+FSYNC_INTERVAL = 0.05  # seconds between fsyncs of the append-only log
+SNAPSHOT_EVERY = 10000  # log records written before compacting into a snapshot
+BULK_LIMIT = 10000  # maximum items in one /api/tasks/bulk request
+CHANGE_HISTORY = 10000  # changed task ids remembered for /api/tasks/changes
+SUBSCRIBER_QUEUE_SIZE = 64  # undelivered events before a live-update client is dropped
+KEEPALIVE_INTERVAL = 15  # seconds between keepalive comments on live-update streams
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = [
+        asyncio.create_task(flush_periodically()),
+        asyncio.create_task(watch_streams())
+    ]
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        tasks.backend.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Set up templates and static files
 templates = Jinja2Templates(directory="templates")
@@ -21,56 +51,900 @@ class TaskUpdate(BaseModel):
     title: Optional[str] = None
     completed: Optional[bool] = None
 
-# In-memory storage
-tasks = []
-task_counter = 1
+class TaskCreate(BaseModel):
+    title: str
+
+class BulkTaskUpdate(TaskUpdate):
+    id: int
+
+class BulkResult(BaseModel):
+    id: Optional[int] = None
+    status: str  # "applied", "not_found" or "rolled_back"
+    task: Optional[Task] = None
+
+class BulkResponse(BaseModel):
+    applied: bool
+    results: List[BulkResult]
+
+class TaskChanges(BaseModel):
+    version: int
+    updated: List[Task]
+    deleted: List[int]
+
+class TaskEvent(TaskChanges):
+    counts: Dict[str, int]
+
+# Serializes already-validated Task objects straight to JSON without re-validating them
+task_list_adapter = TypeAdapter(List[Task])
+
+# Persistence backends
+class StorageBackend:
+    """Persistence hook underneath TaskStore; this base class keeps nothing.
+
+    TaskStore always serves reads from memory and forwards every mutation
+    here, so a backend only has to make writes durable and rebuild the task
+    list on startup.
+    """
+
+    def load(self) -> Tuple[List[Task], int, int]:
+        """Return the stored tasks in insertion order, the next free id and the store version."""
+        return [], 1, 0
+
+    def create(self, task_id: int, title: str) -> int:
+        """Persist a new task and return the id it was stored under."""
+        return task_id
+
+    def save(self, task: Task):
+        pass
+
+    def delete(self, task_id: int):
+        pass
+
+    @contextmanager
+    def batch(self):
+        """Make the writes issued inside the block durable as one unit, or not at all."""
+        yield
+
+    def set_version(self, version: int, task_ids: List[int]):
+        """Record the store version reached by the batch that is being written,
+        and the ids of the tasks it touched."""
+
+    def checkpoint(self, tasks: List[Task], next_id: int):
+        """Called after each mutation; backends may compact their storage."""
+
+    def changed(self) -> bool:
+        """Whether another process has modified the storage since we last looked."""
+        return False
+
+    def changes_since(self, version: int) -> Optional[Tuple[int, List[Tuple[int, int, Optional[Task]]]]]:
+        """Return the store version now stored, and (version, task id, task or
+        None if deleted) for every task changed after version, oldest change
+        first; or None if the storage cannot tell, so the caller must reload."""
+        return None
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class LogBackend(StorageBackend):
+    """Append-only JSON-lines log with periodic compacted snapshots.
+
+    Every mutation appends one line and is handed to the OS immediately, so a
+    process crash loses nothing. fsync is batched to at most one call per
+    FSYNC_INTERVAL, bounding what an OS crash can lose. Once the log holds
+    SNAPSHOT_EVERY records the full task list is written to a snapshot file
+    and the log is truncated, keeping startup replay short.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = FSYNC_INTERVAL, snapshot_every: int = SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self._records = 0
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self._file = None
+        self._batch: Optional[List[dict]] = None
+        self._version = 0
+
+    def load(self) -> Tuple[List[Task], int, int]:
+        loaded: Dict[int, Task] = {}
+        next_id = 1
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            next_id = snapshot["next_id"]
+            self._version = snapshot.get("version", 0)
+            for data in snapshot["tasks"]:
+                loaded[data["id"]] = Task(**data)
+
+        good_offset = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    # A torn write from a crash ends the usable log; drop it and anything after
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    next_id = self._apply(loaded, record, next_id)
+                    self._version = record.get("v", self._version)
+                    good_offset += len(line)
+                    self._records += 1
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        return list(loaded.values()), next_id, self._version
+
+    def _apply(self, loaded: Dict[int, Task], record: dict, next_id: int) -> int:
+        if record["op"] == "put":
+            task = Task(**record["task"])
+            loaded[task.id] = task
+            return max(next_id, task.id + 1)
+        if record["op"] == "del":
+            loaded.pop(record["id"], None)
+        elif record["op"] == "batch":
+            for op in record["ops"]:
+                next_id = self._apply(loaded, op, next_id)
+        return next_id
+
+    def _append(self, record: dict):
+        if self._batch is not None:
+            self._batch.append(record)
+            return
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._records += 1
+        self._dirty = True
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.flush()
+
+    def create(self, task_id: int, title: str) -> int:
+        self._append({"op": "put", "task": {"id": task_id, "title": title, "completed": False}})
+        return task_id
+
+    def save(self, task: Task):
+        self._append({"op": "put", "task": task.model_dump()})
+
+    def delete(self, task_id: int):
+        self._append({"op": "del", "id": task_id})
+
+    @contextmanager
+    def batch(self):
+        # A batch is logged as a single line, so replay sees all of it or none of it
+        self._batch = []
+        try:
+            yield
+            records = self._batch
+        finally:
+            self._batch = None
+        if records:
+            record = records[0] if len(records) == 1 else {"op": "batch", "ops": records}
+            record["v"] = self._version
+            self._append(record)
+
+    def set_version(self, version: int, task_ids: List[int]):
+        self._version = version
+
+    def checkpoint(self, tasks: List[Task], next_id: int):
+        if self._records < self.snapshot_every:
+            return
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"next_id": next_id, "version": self._version, "tasks": [task.model_dump() for task in tasks]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # The snapshot now covers every logged record, so the log can start over
+        self._file.seek(0)
+        self._file.truncate()
+        self._records = 0
+        self.flush()
+
+    def flush(self):
+        if self._file is None or not self._dirty:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+class SQLiteBackend(StorageBackend):
+    """SQLite-backed storage that several uvicorn workers can share.
+
+    Ids come from the database so workers never hand out the same one, and
+    PRAGMA data_version tells each worker cheaply when another one has
+    committed. Each commit also logs the ids it touched in a changes table,
+    so a stale worker re-reads only those tasks rather than the whole table;
+    it reloads everything only once the versions it missed have been trimmed
+    from the log.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "title TEXT NOT NULL, "
+            "completed INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            "version INTEGER NOT NULL, "
+            "task_id INTEGER NOT NULL, "
+            "PRIMARY KEY (version, task_id)) WITHOUT ROWID"
+        )
+        self._data_version = None
+
+    def _current_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> Tuple[List[Task], int, int]:
+        rows = self._conn.execute("SELECT id, title, completed FROM tasks ORDER BY id").fetchall()
+        version = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        self._data_version = self._current_version()
+        loaded = [Task(id=row[0], title=row[1], completed=bool(row[2])) for row in rows]
+        return loaded, (loaded[-1].id + 1 if loaded else 1), (version[0] if version else 0)
+
+    def create(self, task_id: int, title: str) -> int:
+        return self._conn.execute("INSERT INTO tasks (title, completed) VALUES (?, 0)", (title,)).lastrowid
+
+    def save(self, task: Task):
+        self._conn.execute(
+            "UPDATE tasks SET title = ?, completed = ? WHERE id = ?",
+            (task.title, int(task.completed), task.id)
+        )
+
+    def delete(self, task_id: int):
+        self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    @contextmanager
+    def batch(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def set_version(self, version: int, task_ids: List[int]):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('version', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (version,)
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO changes (version, task_id) VALUES (?, ?)",
+            [(version, task_id) for task_id in task_ids]
+        )
+        # Every version touches at least one task, so this keeps the last CHANGE_HISTORY versions
+        self._conn.execute("DELETE FROM changes WHERE version <= ?", (version - CHANGE_HISTORY,))
+
+    def changed(self) -> bool:
+        # data_version only moves for commits made by other connections
+        return self._current_version() != self._data_version
+
+    def changes_since(self, version: int) -> Optional[Tuple[int, List[Tuple[int, int, Optional[Task]]]]]:
+        # Read in one transaction so the version and the rows agree; inside a
+        # write batch the BEGIN IMMEDIATE already provides that
+        own_transaction = not self._conn.in_transaction
+        if own_transaction:
+            self._conn.execute("BEGIN")
+        try:
+            self._data_version = self._current_version()
+            stored = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            current = stored[0] if stored else 0
+            if current == version:
+                return current, []
+            oldest = self._conn.execute("SELECT MIN(version) FROM changes").fetchone()[0]
+            if oldest is None or oldest > version + 1:
+                return None
+            rows = self._conn.execute(
+                "SELECT c.task_id, MAX(c.version), t.title, t.completed "
+                "FROM changes c LEFT JOIN tasks t ON t.id = c.task_id "
+                "WHERE c.version > ? GROUP BY c.task_id ORDER BY 2",
+                (version,)
+            ).fetchall()
+        finally:
+            if own_transaction:
+                self._conn.execute("COMMIT")
+        return current, [
+            (changed_at, task_id, None if title is None else Task(id=task_id, title=title, completed=bool(completed)))
+            for task_id, changed_at, title, completed in rows
+        ]
+
+    def close(self):
+        self._conn.close()
+
+def create_backend(kind: str, path: Optional[str] = None) -> StorageBackend:
+    if kind == "memory":
+        return StorageBackend()
+    if kind == "log":
+        return LogBackend(path or "tasks.log")
+    if kind == "sqlite":
+        return SQLiteBackend(path or "tasks.db")
+    raise ValueError(f"Unknown task storage backend: {kind}")
+
+# Task storage
+class TaskStore:
+    """In-memory task storage keyed by id, backed by a StorageBackend.
+
+    Tasks are kept in a dict, which preserves insertion order and gives O(1)
+    lookup, update and delete. Completed and pending ids are tracked in two
+    secondary indexes so filtered views never scan the whole store, and a
+    sorted id list lets pagination seek straight to a cursor.
+
+    Every committed write bumps a monotonically increasing version, and the
+    most recent version at which each task changed is kept so clients can
+    fetch only what changed since the version they last saw.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or StorageBackend()
+        # Previous versions of tasks touched by the open transaction, for rollback
+        self._undo: Optional[List[Tuple[int, Optional[Task]]]] = None
+        # Called with the touched task ids after every committed transaction,
+        # including other workers' ones picked up by sync(); None after a full reload
+        self.listeners: List[Callable[[Optional[List[int]]], None]] = []
+        self._reload()
+
+    def _reload(self):
+        self._tasks: Dict[int, Task] = {}
+        self._completed: Dict[int, None] = {}
+        self._pending: Dict[int, None] = {}
+        # Sorted ids for cursor seeks; deleted ids stay behind until compacted
+        self._order: List[int] = []
+        self._stale = 0
+        loaded, self.next_id, self.version = self.backend.load()
+        for task in loaded:
+            self._tasks[task.id] = task
+            self._index(task)
+        self._order = sorted(self._tasks)
+        # Task id -> version of its last change, oldest first
+        self._changes: Dict[int, int] = {}
+        # Oldest version /changes can still diff against
+        self._history_start = self.version
+
+    def sync(self):
+        """Pick up writes made by other workers sharing the same backend.
+
+        Only the tasks those writes touched are re-read and re-indexed; the
+        store reloads in full only when the backend can no longer say which
+        tasks changed since our version.
+        """
+        if not self.backend.changed():
+            return
+        changes = self.backend.changes_since(self.version)
+        if changes is None:
+            self._reload()
+            touched = None
+        else:
+            self.version, changed = changes
+            touched = []
+            for version, task_id, task in changed:
+                self._replace(task_id, task)
+                self._changes.pop(task_id, None)
+                self._changes[task_id] = version
+                touched.append(task_id)
+            while len(self._changes) > CHANGE_HISTORY:
+                self._history_start = self._changes.pop(next(iter(self._changes)))
+            if not touched:
+                return
+        for listener in self.listeners:
+            listener(touched)
+
+    def _replace(self, task_id: int, task: Optional[Task]):
+        """Store another worker's version of a task, or drop it if task is None."""
+        if task is None:
+            if self._tasks.pop(task_id, None) is not None:
+                self._unindex(task_id)
+            return
+        if task_id not in self._tasks:
+            # Keep the dict in id order, which filter() relies on
+            out_of_order = bool(self._tasks) and task_id < next(reversed(self._tasks))
+            self._tasks[task_id] = task
+            if out_of_order:
+                self._tasks = {i: self._tasks[i] for i in sorted(self._tasks)}
+            if not self._order or task_id > self._order[-1]:
+                self._order.append(task_id)
+            else:
+                insort(self._order, task_id)
+            self.next_id = max(self.next_id, task_id + 1)
+        self._tasks[task_id] = task
+        self._index(task)
+
+    def _remember(self, task_id: int, previous: Optional[Task]):
+        if self._undo is not None:
+            self._undo.append((task_id, previous))
+
+    @contextmanager
+    def transaction(self):
+        """Apply the mutations made inside the block atomically.
+
+        The backend persists them as one unit together with the new version,
+        and if the block raises, both the backend and the in-memory store are
+        rolled back.
+        """
+        next_id = self.next_id
+        self._undo = []
+        try:
+            with self.backend.batch():
+                self.sync()
+                yield self
+                touched = list(dict.fromkeys(task_id for task_id, _ in self._undo))
+                if touched:
+                    self.backend.set_version(self.version + 1, touched)
+        except BaseException:
+            self._rollback(self._undo, next_id)
+            raise
+        finally:
+            self._undo = None
+        if touched:
+            self._record_changes(touched)
+            # Compact only between transactions, so a snapshot never holds half of one
+            self.backend.checkpoint(list(self._tasks.values()), self.next_id)
+            for listener in self.listeners:
+                listener(touched)
+
+    @contextmanager
+    def _write(self):
+        if self._undo is not None:
+            yield
+        else:
+            with self.transaction():
+                yield
+
+    def _record_changes(self, touched: List[int]):
+        self.version += 1
+        for task_id in touched:
+            self._changes.pop(task_id, None)
+            self._changes[task_id] = self.version
+        while len(self._changes) > CHANGE_HISTORY:
+            self._history_start = self._changes.pop(next(iter(self._changes)))
+
+    def _rollback(self, undo: List[Tuple[int, Optional[Task]]], next_id: int):
+        restored = False
+        for task_id, previous in reversed(undo):
+            self._tasks.pop(task_id, None)
+            self._completed.pop(task_id, None)
+            self._pending.pop(task_id, None)
+            if previous is not None:
+                self._tasks[task_id] = previous
+                self._index(previous)
+                restored = True
+        if restored:
+            self._tasks = {task_id: self._tasks[task_id] for task_id in sorted(self._tasks)}
+        self._order = sorted(self._tasks)
+        self._stale = 0
+        self.next_id = next_id
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._tasks.values())
+
+    def _index(self, task: Task):
+        if task.completed:
+            self._pending.pop(task.id, None)
+            self._completed[task.id] = None
+        else:
+            self._completed.pop(task.id, None)
+            self._pending[task.id] = None
+
+    def _unindex(self, task_id: int):
+        """Drop a task that was just removed from _tasks from the indexes."""
+        self._completed.pop(task_id, None)
+        self._pending.pop(task_id, None)
+        self._stale += 1
+        if self._stale > len(self._tasks):
+            self._order = [i for i in self._order if i in self._tasks]
+            self._stale = 0
+
+    def get(self, task_id: int) -> Optional[Task]:
+        self.sync()
+        return self._tasks.get(task_id)
+
+    def add(self, title: str) -> Task:
+        with self._write():
+            task = Task(id=self.backend.create(self.next_id, title), title=title)
+            self._remember(task.id, None)
+            self._tasks[task.id] = task
+            self._index(task)
+            if not self._order or task.id > self._order[-1]:
+                self._order.append(task.id)
+            else:
+                insort(self._order, task.id)
+            self.next_id = max(self.next_id, task.id + 1)
+        return task
+
+    def update(self, task_id: int, title: Optional[str] = None, completed: Optional[bool] = None) -> Optional[Task]:
+        with self._write():
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            self._remember(task_id, task.model_copy())
+            if title is not None:
+                task.title = title
+            if completed is not None:
+                task.completed = completed
+                self._index(task)
+            self.backend.save(task)
+        return task
+
+    def toggle(self, task_id: int) -> Optional[Task]:
+        with self._write():
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            return self.update(task_id, completed=not task.completed)
+
+    def delete(self, task_id: int) -> Optional[Task]:
+        with self._write():
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return None
+            self._remember(task_id, task)
+            self._unindex(task_id)
+            self.backend.delete(task_id)
+        return task
+
+    def filter(self, completed: Optional[bool] = None) -> List[Task]:
+        """Return tasks in insertion order, optionally only completed or pending ones."""
+        self.sync()
+        if completed is None:
+            return list(self._tasks.values())
+        index = self._completed if completed else self._pending
+        # Ids are handed out in increasing order, so sorting restores insertion order
+        return [self._tasks[task_id] for task_id in sorted(index)]
+
+    def page(self, completed: Optional[bool] = None, after_id: Optional[int] = None, limit: int = 100) -> Tuple[List[Task], bool]:
+        """Return up to limit tasks with id greater than after_id, and whether more follow."""
+        self.sync()
+        if completed is None:
+            index = self._tasks
+        else:
+            index = self._completed if completed else self._pending
+        order = self._order
+        position = bisect_right(order, after_id) if after_id is not None else 0
+        page: List[Task] = []
+        while position < len(order):
+            task_id = order[position]
+            position += 1
+            if task_id in index:
+                if len(page) == limit:
+                    return page, True
+                page.append(self._tasks[task_id])
+        return page, False
+
+    def counts(self) -> Dict[str, int]:
+        self.sync()
+        return {"total": len(self._tasks), "completed": len(self._completed), "pending": len(self._pending)}
+
+    def current_version(self) -> int:
+        self.sync()
+        return self.version
+
+    def changes_since(self, since: int) -> Optional[Tuple[List[Task], List[int]]]:
+        """Return (updated tasks, deleted ids) changed after version since, oldest first.
+
+        Returns None when since is outside the retained history, in which case
+        the caller has to fall back to a full listing.
+        """
+        self.sync()
+        if since < self._history_start or since > self.version:
+            return None
+        changed: List[int] = []
+        for task_id in reversed(self._changes):
+            if self._changes[task_id] <= since:
+                break
+            changed.append(task_id)
+        changed.reverse()
+        return self.diff(changed)
+
+    def diff(self, task_ids: List[int]) -> Tuple[List[Task], List[int]]:
+        """Split task_ids into the tasks that still exist and the ids that were deleted."""
+        updated: List[Task] = []
+        deleted: List[int] = []
+        for task_id in dict.fromkeys(task_ids):
+            task = self._tasks.get(task_id)
+            if task is None:
+                deleted.append(task_id)
+            else:
+                updated.append(task)
+        return updated, deleted
+
+tasks = TaskStore(create_backend(TASK_STORAGE, TASK_STORAGE_PATH))
+
+async def flush_periodically():
+    """fsync trailing log writes that arrived after the last batched fsync."""
+    while True:
+        await asyncio.sleep(FSYNC_INTERVAL)
+        tasks.backend.flush()
+
+# Live updates
+class BroadcastHub:
+    """Fans pre-formatted Server-Sent Events frames out to subscriber queues.
+
+    Each frame is serialized once no matter how many clients are listening,
+    and an idle subscriber is just a bounded queue with a coroutine parked on
+    it. A subscriber whose queue fills up is dropped rather than allowed to
+    buffer without limit; its browser reconnects with Last-Event-ID and
+    catches up through the change history.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, frame: str):
+        slow = []
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                slow.append(queue)
+        for queue in slow:
+            self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        # Discard the backlog to make room for the sentinel that ends the stream
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self.dropped += 1
+
+    async def stream(self, queue: asyncio.Queue, first: Optional[str] = None) -> AsyncIterator[str]:
+        try:
+            if first:
+                yield first
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(queue)
+
+hub = BroadcastHub()
+
+def changes_frame(updated: List[Task], deleted: List[int]) -> str:
+    event = TaskEvent.model_construct(version=tasks.version, updated=updated, deleted=deleted, counts=tasks.counts())
+    return f"id: {tasks.version}\ndata: {event.model_dump_json()}\n\n"
+
+def resync_frame() -> str:
+    return f"id: {tasks.version}\nevent: resync\ndata: {json.dumps({'version': tasks.version})}\n\n"
+
+def publish_task_changes(touched: Optional[List[int]]):
+    if not hub:
+        return
+    # After a full reload there is no diff to send, so clients refetch
+    hub.publish(resync_frame() if touched is None else changes_frame(*tasks.diff(touched)))
+
+tasks.listeners.append(publish_task_changes)
+
+async def watch_streams():
+    """Keep live-update streams open and tell them about writes made by other workers."""
+    elapsed = 0
+    while True:
+        await asyncio.sleep(1)
+        elapsed += 1
+        if not hub:
+            continue
+        # Picks up other workers' writes; the store's listeners publish them
+        tasks.sync()
+        if elapsed >= KEEPALIVE_INTERVAL:
+            hub.publish(": keepalive\n\n")
+            elapsed = 0
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names the current representation."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+# Ask clients to revalidate every time; with an ETag that costs a 304 when nothing changed
+CACHE_HEADERS = {"Cache-Control": "no-cache"}
 
 # API endpoints
 @app.get("/api/tasks", response_model=List[Task])
-async def get_tasks():
-    return tasks
+async def get_tasks(
+    request: Request,
+    completed: Optional[bool] = Query(None, description="Only completed (true) or pending (false) tasks"),
+    after_id: Optional[int] = Query(None, ge=0, description="Cursor: return tasks after this id"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated task fields to include, e.g. id,title")
+):
+    include = None
+    if fields:
+        include = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = include - set(Task.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # Every write bumps the store version, so the same URL at the same version is the same body
+    etag = version_etag(tasks.current_version())
+    headers = {"ETag": etag, **CACHE_HEADERS}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    page, has_more = tasks.page(completed=completed, after_id=after_id, limit=limit)
+    if has_more:
+        headers["X-Next-After-Id"] = str(page[-1].id)
+    # Tasks in the store are already validated, so skip response_model re-validation
+    content = task_list_adapter.dump_json(page, include={"__all__": include} if include else None)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@app.get("/api/tasks/changes", response_model=TaskChanges)
+async def get_task_changes(since: int = Query(..., ge=0, description="Store version the client last saw")):
+    """Tasks created, updated or deleted after version since"""
+    changes = tasks.changes_since(since)
+    if changes is None:
+        raise HTTPException(status_code=410, detail="Version is no longer available; reload the full task list")
+    updated, deleted = changes
+    return Response(
+        content=TaskChanges.model_construct(version=tasks.version, updated=updated, deleted=deleted).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": version_etag(tasks.version)}
+    )
+
+@app.get("/api/tasks/events")
+async def task_events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Replay changes after this version first")
+):
+    """Server-Sent Events stream of task changes, one event per committed write"""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    # Subscribe before computing the catch-up so nothing falls between the two
+    queue = hub.subscribe()
+    first = None
+    if since is not None and since != tasks.current_version():
+        changes = tasks.changes_since(since)
+        first = changes_frame(*changes) if changes is not None else resync_frame()
+    return StreamingResponse(
+        hub.stream(queue, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/api/tasks", response_model=Task, status_code=201)
 async def create_task(title: str = Form(...)):
-    global task_counter
-    task = Task(id=task_counter, title=title)
-    tasks.append(task)
-    task_counter += 1
-    return task
+    return tasks.add(title)
+
+# Bulk endpoints; declared before the /{task_id} routes so "bulk" is not parsed as an id
+def apply_bulk(operation, items: list, item_id=None):
+    """Run operation over items in one store transaction.
+
+    If any item refers to a missing task the whole request is rolled back and
+    answered with 404, still reporting what happened to each item.
+    """
+    results: List[BulkResult] = []
+    missing = False
+    try:
+        with tasks.transaction():
+            for item in items:
+                task = operation(item)
+                if task is None:
+                    missing = True
+                    results.append(BulkResult(id=item_id(item) if item_id else None, status="not_found"))
+                else:
+                    results.append(BulkResult(id=task.id, status="applied", task=task.model_copy()))
+            if missing:
+                raise LookupError
+    except LookupError:
+        for result in results:
+            if result.status == "applied":
+                result.status = "rolled_back"
+                result.task = None
+        return JSONResponse(status_code=404, content=BulkResponse(applied=False, results=results).model_dump())
+    return BulkResponse(applied=True, results=results)
+
+@app.post("/api/tasks/bulk", response_model=BulkResponse)
+async def bulk_create_tasks(items: List[TaskCreate] = Body(..., max_length=BULK_LIMIT)):
+    return apply_bulk(lambda item: tasks.add(item.title), items)
+
+@app.put("/api/tasks/bulk", response_model=BulkResponse)
+async def bulk_update_tasks(items: List[BulkTaskUpdate] = Body(..., max_length=BULK_LIMIT)):
+    return apply_bulk(
+        lambda item: tasks.update(item.id, title=item.title, completed=item.completed),
+        items,
+        item_id=lambda item: item.id
+    )
+
+@app.put("/api/tasks/bulk/toggle", response_model=BulkResponse)
+async def bulk_toggle_tasks(task_ids: List[int] = Body(..., max_length=BULK_LIMIT)):
+    return apply_bulk(tasks.toggle, task_ids, item_id=lambda task_id: task_id)
+
+@app.delete("/api/tasks/bulk", response_model=BulkResponse)
+async def bulk_delete_tasks(task_ids: List[int] = Body(..., max_length=BULK_LIMIT)):
+    return apply_bulk(tasks.delete, task_ids, item_id=lambda task_id: task_id)
+
+@app.delete("/api/tasks/completed", response_model=BulkResponse)
+async def delete_completed_tasks():
+    # Chosen inside the transaction, so tasks completed elsewhere since the page rendered are included
+    with tasks.transaction():
+        deleted = [tasks.delete(task.id) for task in tasks.filter(True)]
+    return BulkResponse(
+        applied=True,
+        results=[BulkResult(id=task.id, status="applied", task=task.model_copy()) for task in deleted]
+    )
 
 @app.put("/api/tasks/{task_id}", response_model=Task)
 async def update_task(task_id: int, task_update: TaskUpdate):
-    for task in tasks:
-        if task.id == task_id:
-            if task_update.title is not None:
-                task.title = task_update.title
-            if task_update.completed is not None:
-                task.completed = task_update.completed
-            return task
-    raise HTTPException(status_code=404, detail="Task not found")
+    task = tasks.update(task_id, title=task_update.title, completed=task_update.completed)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 # Additional endpoint for just toggling completion status
 @app.put("/api/tasks/{task_id}/toggle", response_model=Task)
 async def toggle_task(task_id: int):
-    for task in tasks:
-        if task.id == task_id:
-            task.completed = not task.completed
-            return task
-    raise HTTPException(status_code=404, detail="Task not found")
+    task = tasks.toggle(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 @app.delete("/api/tasks/{task_id}")
 async def delete_task(task_id: int):
-    for i, task in enumerate(tasks):
-        if task.id == task_id:
-            return tasks.pop(i)
-    raise HTTPException(status_code=404, detail="Task not found")
+    task = tasks.delete(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 # Web UI routes
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
+async def home(request: Request, completed: Optional[bool] = None):
+    etag = version_etag(tasks.current_version())
+    headers = {"ETag": etag, **CACHE_HEADERS}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
     return templates.TemplateResponse(
         "index.html",
-        {"request": request, "tasks": tasks}
+        {
+            "request": request,
+            "tasks": tasks.filter(completed),
+            "counts": tasks.counts(),
+            "version": tasks.version
+        },
+        headers=headers
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,437 @@
+"""Command-line checks and benchmarks for the expense tracker in main.py.
+
+Every command builds a scratch database of its own in a temporary directory
+and calls the app's endpoint functions directly, so expenses.db is never
+touched. Run it from this directory, like main.py:
+
+    python bench.py check-query-plans
+"""
+from fastapi import Response, UploadFile
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from typing import Dict, List
+from datetime import date, timedelta
+from main import (
+    CATEGORIES, DEFAULT_LIMIT, IMPORT_BATCH_SIZE, SEARCH_LIMIT, ExpenseDB, create_expense_engine, prepare_database,
+    rebuild_rollups, expense_list_query, expense_summary, fetch_expense_page, cached_expense_summary,
+    summary_cache, render_summary, templates, create_expense, get_expenses, get_expense_series, get_top_descriptions,
+    import_expenses, search_expenses
+)
+import argparse
+import asyncio
+import csv
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+# Scratch data
+SYNTHETIC_DESCRIPTIONS = (
+    "Lunch at restaurant", "Bus fare", "Groceries", "Movie tickets", "Internet bill",
+    "Doctor visit", "Coffee", "Train ticket", "Pharmacy", "Electricity bill",
+)
+
+def synthetic_expenses(count: int, first: date = date(2020, 1, 1), days: int = 1826, seed: int = 0):
+    """Yield `count` reproducible expense rows spread over `days` days from `first`"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            "amount": round(rng.uniform(1, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": rng.choice(SYNTHETIC_DESCRIPTIONS),
+            "date": first + timedelta(days=rng.randrange(days)),
+        }
+
+def scratch_database(directory: str, expenses: int = 0):
+    """Sync and async engines on a new database in `directory` holding
+    `expenses` synthetic expenses (plus the sample data), with the rollups
+    and search index built"""
+    url = f"sqlite:///{directory}/scratch.db"
+    sync_scratch = create_engine(url)
+    with sync_scratch.begin() as connection:
+        prepare_database(connection)
+    rows = synthetic_expenses(expenses)
+    while batch := [row for _, row in zip(range(IMPORT_BATCH_SIZE * 10), rows)]:
+        with sync_scratch.begin() as connection:
+            connection.execute(insert(ExpenseDB), batch)
+    with sync_scratch.begin() as connection:
+        rebuild_rollups(connection)
+    return sync_scratch, create_expense_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+
+# Query plans
+# Query shapes behind each list endpoint, as keyword arguments to expense_list_query
+LIST_QUERY_SHAPES = {
+    "home": {},
+    "get_expenses": {"start_date": date(2024, 1, 1), "end_date": date(2024, 12, 31)},
+    "get_expenses (start only)": {"start_date": date(2024, 1, 1)},
+    "get_expenses_by_category": {"category": "Food"},
+    "filter_expenses": {"category": "Food", "start_date": date(2024, 1, 1), "end_date": date(2024, 12, 31)},
+    "home (next page)": {"after": (date(2024, 6, 1), 100)},
+    "get_expenses (next page)": {"start_date": date(2024, 1, 1), "after": (date(2024, 6, 1), 100)},
+    "filter_expenses (next page)": {"category": "Food", "after": (date(2024, 6, 1), 100)},
+}
+
+def query_plan_problems() -> List[str]:
+    """Run EXPLAIN QUERY PLAN for every list query shape and report any that
+    scan the expenses table or sort in a temporary b-tree.
+
+    Filtered shapes must SEARCH an index; the unfiltered list may walk the
+    date index in order, but never the table itself.
+    """
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, _ = scratch_database(directory)
+        with sync_scratch.connect() as conn:
+            for name, params in LIST_QUERY_SHAPES.items():
+                compiled = expense_list_query(**params).compile(sync_scratch)
+                values = tuple(
+                    value.isoformat() if isinstance(value, date) else value
+                    for value in (compiled.params[key] for key in compiled.positiontup)
+                )
+                plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", values)]
+                for detail in plan:
+                    scan = detail.startswith("SCAN expenses") and (params or "INDEX" not in detail)
+                    if scan or "TEMP B-TREE" in detail:
+                        problems.append(f"{name}: {detail}")
+        sync_scratch.dispose()
+    return problems
+
+
+# Benchmarks
+async def benchmark_concurrency(requests: int, concurrency: int, expenses: int = 100000) -> Dict[str, float]:
+    """Serve `requests` requests, `concurrency` at a time, from a scratch
+    database of `expenses` expenses through the app's connection pool.
+
+    One request in ten creates an expense; the rest alternate between the
+    first page of the current year and the summary for a random month, which
+    is what the dashboard asks for. Reports throughput and latency.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory, expenses)
+        sync_scratch.dispose()
+        ScratchSession = async_sessionmaker(async_scratch, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        slots = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+        
+        async def request(i: int):
+            nonlocal errors
+            async with slots, ScratchSession() as db:
+                started = time.perf_counter()
+                try:
+                    if i % 10 == 0:
+                        await create_expense(
+                            amount=12.5, category=CATEGORIES[i % len(CATEGORIES)], description="Benchmark",
+                            expense_date=date(2024, 1 + i % 12, 1), db=db
+                        )
+                    elif i % 2:
+                        await get_expenses(
+                            response=Response(), start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+                            limit=DEFAULT_LIMIT, cursor=None, db=db
+                        )
+                    else:
+                        month = 1 + i % 12
+                        await expense_summary(db, date(2024, month, 1), date(2024, month, 28))
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        await async_scratch.dispose()
+    
+    latencies.sort()
+    return {
+        "requests_per_second": requests / elapsed,
+        "errors": errors,
+        "median_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+SERIES_BENCHMARKS = {
+    "month by category": {"period": "month", "by_category": True},
+    "month combined": {"period": "month", "by_category": False},
+    "week by category": {"period": "week", "by_category": True},
+    "week combined": {"period": "week", "by_category": False},
+    "week, one category, one year": {
+        "period": "week", "by_category": True, "category": "Food",
+        "start_date": date(2023, 1, 1), "end_date": date(2023, 12, 31)
+    },
+}
+
+TOP_DESCRIPTIONS_BENCHMARKS = {
+    "top descriptions": {},
+    "top descriptions, one category": {"category": "Food"},
+    "top descriptions, one year": {"start_date": date(2023, 1, 1), "end_date": date(2023, 12, 31)},
+}
+
+async def benchmark_series(expenses: int, repeats: int = 20) -> Dict[str, float]:
+    """Time get_expense_series and get_top_descriptions over a scratch database
+    of `expenses` synthetic expenses spread over five years, in median
+    milliseconds per call"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory, expenses)
+        sync_scratch.dispose()
+        ScratchSession = async_sessionmaker(async_scratch, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        timings = {}
+        async with ScratchSession() as db:
+            calls = [
+                (name, get_expense_series, {"window": 3, "start_date": None, "end_date": None, "category": None, **shape})
+                for name, shape in SERIES_BENCHMARKS.items()
+            ] + [
+                (name, get_top_descriptions, {"n": 10, "start_date": None, "end_date": None, "category": None, **shape})
+                for name, shape in TOP_DESCRIPTIONS_BENCHMARKS.items()
+            ]
+            for name, endpoint, params in calls:
+                samples = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    await endpoint(db=db, **params)
+                    samples.append(time.perf_counter() - started)
+                timings[name] = statistics.median(samples) * 1000
+        await async_scratch.dispose()
+    return timings
+
+# Each matches a tenth of the synthetic expenses or more, so every search has
+# far more matches than it ranks
+SEARCH_BENCHMARKS = {
+    "word": {"q": "groceries"},
+    "word, one category": {"q": "groceries", "category": "Food"},
+    "word, one year": {"q": "bill", "start_date": date(2023, 1, 1), "end_date": date(2023, 12, 31)},
+    "phrase": {"q": '"bus fare"'},
+    "prefix": {"q": "bil*"},
+    "word, page 5": {"q": "coffee", "offset": 80},
+}
+
+async def benchmark_search(expenses: int, repeats: int = 20) -> Dict[str, float]:
+    """Time search_expenses over a scratch database of `expenses` synthetic
+    expenses, in median milliseconds per page"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory, expenses)
+        sync_scratch.dispose()
+        ScratchSession = async_sessionmaker(async_scratch, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        timings = {}
+        async with ScratchSession() as db:
+            for name, shape in SEARCH_BENCHMARKS.items():
+                params = {"start_date": None, "end_date": None, "category": None, "limit": SEARCH_LIMIT, "offset": 0, **shape}
+                samples = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    await search_expenses(db=db, **params)
+                    samples.append(time.perf_counter() - started)
+                    db.expunge_all()
+                timings[name] = statistics.median(samples) * 1000
+        await async_scratch.dispose()
+    return timings
+
+async def benchmark_render(rows: int, repeats: int = 10) -> Dict[str, float]:
+    """Render the dashboard with a page of `rows` expenses read from a scratch
+    database, in median milliseconds for the whole page, the rows fragment
+    alone and the memoized summary block"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory, rows)
+        sync_scratch.dispose()
+        ScratchSession = async_sessionmaker(async_scratch, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        async with ScratchSession() as db:
+            expenses, next_cursor = await fetch_expense_page(db, rows)
+            total, breakdown, count = await cached_expense_summary(db)
+        await async_scratch.dispose()
+    
+    page = templates.get_template("index.html")
+    rows_fragment = templates.get_template("_expense_rows.html")
+    renders = {
+        "page": lambda: page.render(
+            expenses=expenses,
+            next_cursor=next_cursor,
+            summary_html=render_summary(total, count, tuple(breakdown.items()))
+        ),
+        "rows": lambda: rows_fragment.render(expenses=expenses),
+        "summary": lambda: render_summary(total, count, tuple(breakdown.items())),
+    }
+    timings = {}
+    for name, render in renders.items():
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            render()
+            samples.append(time.perf_counter() - started)
+        timings[name] = statistics.median(samples) * 1000
+    return timings
+
+async def benchmark_import(rows: int) -> Dict[str, float]:
+    """Import a CSV of `rows` synthetic expenses into a scratch database
+    through import_expenses, in rows per second"""
+    data = io.StringIO()
+    writer = csv.DictWriter(data, fieldnames=["amount", "category", "description", "date"])
+    writer.writeheader()
+    writer.writerows(synthetic_expenses(rows))
+    upload = data.getvalue().encode()
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        sync_scratch.dispose()
+        ScratchSession = async_sessionmaker(async_scratch, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        async with ScratchSession() as db:
+            started = time.perf_counter()
+            result = await import_expenses(
+                file=UploadFile(io.BytesIO(upload), filename="expenses.csv"), import_format=None, db=db
+            )
+            elapsed = time.perf_counter() - started
+        await async_scratch.dispose()
+    return {"imported": result.imported, "failed": result.failed, "rows_per_second": rows / elapsed}
+
+def benchmark_startup(repeats: int = 5) -> Dict[str, float]:
+    """Time what a new worker does before it can serve, in median milliseconds:
+    importing main.py in a fresh interpreter (less the interpreter's own
+    start), the first prepare_database on an empty database, and the same
+    call on a database that is already at SCHEMA_VERSION"""
+    app_directory = os.path.dirname(os.path.abspath(__file__))
+    
+    def run(code: str) -> float:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=app_directory, check=True)
+        return time.perf_counter() - started
+    
+    interpreter = statistics.median(run("pass") for _ in range(repeats))
+    imports = statistics.median(run("import main") for _ in range(repeats))
+    
+    first, repeat = [], []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as directory:
+            scratch = create_engine(f"sqlite:///{directory}/scratch.db")
+            for samples in (first, repeat):
+                started = time.perf_counter()
+                with scratch.begin() as connection:
+                    prepare_database(connection)
+                samples.append(time.perf_counter() - started)
+            scratch.dispose()
+    return {
+        "import": (imports - interpreter) * 1000,
+        "first_start": statistics.median(first) * 1000,
+        "repeat_start": statistics.median(repeat) * 1000,
+    }
+
+async def summary_cache_problems() -> List[str]:
+    """Prime the summary cache the way the dashboard does, write an expense
+    covered by each cached summary, and report every summary that is still
+    served without it"""
+    shapes = {
+        "all expenses": {},
+        "All Categories (category=)": {"category": "", "start_date": date(2024, 1, 1), "end_date": date(2024, 12, 31)},
+        "Food": {"category": "Food", "start_date": date(2024, 1, 1), "end_date": date(2024, 12, 31)},
+        "open start": {"end_date": date(2024, 12, 31)},
+    }
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        sync_scratch.dispose()
+        ScratchSession = async_sessionmaker(async_scratch, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        # Summaries cached before this run describe another database
+        summary_cache.clear()
+        async with ScratchSession() as db:
+            before = {name: await cached_expense_summary(db, **shape) for name, shape in shapes.items()}
+            await create_expense(
+                amount=1000.0, category="Food", description="Cache check", expense_date=date(2024, 6, 1), db=db
+            )
+            for name, shape in shapes.items():
+                total, _, count = await cached_expense_summary(db, **shape)
+                if (round(total - before[name][0], 2), count - before[name][2]) != (1000.0, 1):
+                    problems.append(f"{name}: still served {before[name][0]:.2f} after a 1000.00 Food expense")
+        await async_scratch.dispose()
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expense Tracker checks and benchmarks")
+    parser.add_argument(
+        "command",
+        choices=[
+            "check-query-plans", "check-summary-cache", "benchmark-concurrency", "benchmark-series",
+            "benchmark-search", "benchmark-render", "benchmark-import", "benchmark-startup"
+        ],
+        help="check-query-plans fails if a list query stops using an index; "
+             "check-summary-cache fails if a write leaves a cached summary stale; "
+             "benchmark-concurrency measures throughput under parallel requests; "
+             "benchmark-series times the series and top descriptions over millions of expenses; "
+             "benchmark-search times searches for common words over a million expenses; "
+             "benchmark-render times rendering a 10,000-row dashboard page; "
+             "benchmark-import times a bulk CSV import; "
+             "benchmark-startup times importing the app and preparing a new and an existing database"
+    )
+    parser.add_argument("--requests", type=int, default=5000, help="benchmark-concurrency: requests to serve")
+    parser.add_argument("--concurrency", type=int, default=100, help="benchmark-concurrency: requests in flight at once")
+    parser.add_argument("--series-expenses", type=int, default=2000000, help="benchmark-series: expenses in the database")
+    parser.add_argument("--max-series-ms", type=float, default=100, help="benchmark-series: median milliseconds to allow per series or top descriptions call")
+    parser.add_argument("--search-expenses", type=int, default=1000000, help="benchmark-search: expenses in the database")
+    parser.add_argument("--max-search-ms", type=float, default=50, help="benchmark-search: median milliseconds to allow per search")
+    parser.add_argument("--render-rows", type=int, default=10000, help="benchmark-render: expenses on the page")
+    parser.add_argument("--max-render-ms", type=float, default=500, help="benchmark-render: median milliseconds to allow for the page")
+    parser.add_argument("--import-rows", type=int, default=100000, help="benchmark-import: rows in the CSV")
+    parser.add_argument("--min-import-rate", type=float, default=20000, help="benchmark-import: rows per second to require")
+    parser.add_argument("--max-repeat-start-ms", type=float, default=5, help="benchmark-startup: milliseconds to allow for preparing an up-to-date database")
+    args = parser.parse_args()
+    
+    if args.command == "check-query-plans":
+        problems = query_plan_problems()
+        for problem in problems:
+            print(f"Unindexed query plan - {problem}")
+        if problems:
+            sys.exit(1)
+        print("All list queries use an index")
+    elif args.command == "check-summary-cache":
+        problems = asyncio.run(summary_cache_problems())
+        for problem in problems:
+            print(f"Stale summary - {problem}")
+        if problems:
+            sys.exit(1)
+        print("Every cached summary was invalidated by the write")
+    elif args.command == "benchmark-concurrency":
+        result = asyncio.run(benchmark_concurrency(args.requests, args.concurrency))
+        print(
+            f"{args.requests} requests, {args.concurrency} at a time: {result['requests_per_second']:.0f} requests/sec, "
+            f"median {result['median_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, {result['errors']} errors"
+        )
+        if result["errors"]:
+            sys.exit(1)
+    elif args.command == "benchmark-series":
+        timings = asyncio.run(benchmark_series(args.series_expenses))
+        for name, ms in timings.items():
+            print(f"{name}: {ms:.1f} ms")
+        slow = [name for name, ms in timings.items() if ms > args.max_series_ms]
+        if slow:
+            print(f"Slower than {args.max_series_ms:g} ms: {', '.join(slow)}")
+            sys.exit(1)
+    elif args.command == "benchmark-search":
+        timings = asyncio.run(benchmark_search(args.search_expenses))
+        for name, ms in timings.items():
+            print(f"{name}: {ms:.1f} ms")
+        slow = [name for name, ms in timings.items() if ms > args.max_search_ms]
+        if slow:
+            print(f"Slower than {args.max_search_ms:g} ms: {', '.join(slow)}")
+            sys.exit(1)
+    elif args.command == "benchmark-render":
+        timings = asyncio.run(benchmark_render(args.render_rows))
+        print(
+            f"{args.render_rows}-row page: {timings['page']:.1f} ms "
+            f"(rows {timings['rows']:.1f} ms, summary {timings['summary']:.3f} ms)"
+        )
+        if timings["page"] > args.max_render_ms:
+            sys.exit(1)
+    elif args.command == "benchmark-import":
+        result = asyncio.run(benchmark_import(args.import_rows))
+        print(
+            f"{result['imported']} of {args.import_rows} rows imported ({result['failed']} failed): "
+            f"{result['rows_per_second']:.0f} rows/sec"
+        )
+        if result["imported"] != args.import_rows or result["rows_per_second"] < args.min_import_rate:
+            sys.exit(1)
+    elif args.command == "benchmark-startup":
+        timings = benchmark_startup()
+        print(
+            f"import {timings['import']:.0f} ms, first start {timings['first_start']:.1f} ms, "
+            f"repeat start {timings['repeat_start']:.2f} ms"
+        )
+        if timings["repeat_start"] > args.max_repeat_start_ms:
+            sys.exit(1)
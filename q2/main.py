@@ -1,18 +1,96 @@
-from fastapi import FastAPI, HTTPException, Request, Form, Depends, Query
+from fastapi import FastAPI, HTTPException, Request, Response, Form, Depends, Query, UploadFile, File
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, func
-from sqlalchemy.orm import sessionmaker, Session, declarative_base
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, select, insert, delete, true, tuple_, text, table, column, Column, Integer, String, Float, Date, Index, func, Connection
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import date, datetime
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from markupsafe import Markup
+import argparse
+import datetime as dt
+import base64
+import binascii
+import csv
+import io
+import itertools
+import json
 import os
+import re
+import sys
+import time
+
+PAGE_SIZE = 50  # expenses per page in the web UI
+DEFAULT_LIMIT = 100  # expenses per page in the JSON API
+MAX_LIMIT = 1000
+SEARCH_LIMIT = 20  # search results per page
+SEARCH_CANDIDATES = 1000  # newest matches ranked per search
+SUMMARY_FRAGMENT_CACHE_SIZE = 256  # rendered summary blocks kept for reuse
+
+# Valid categories, in display order, with the badge colours used in the expense table
+CATEGORY_BADGES = {
+    "Food": "bg-yellow-100 text-yellow-800",
+    "Transport": "bg-blue-100 text-blue-800",
+    "Entertainment": "bg-purple-100 text-purple-800",
+    "Shopping": "bg-pink-100 text-pink-800",
+    "Bills": "bg-red-100 text-red-800",
+    "Healthcare": "bg-green-100 text-green-800",
+    "Other": "bg-gray-100 text-gray-800",
+}
+CATEGORIES = tuple(CATEGORY_BADGES)
+CATEGORY_SET = frozenset(CATEGORIES)
+INVALID_CATEGORY = f'Category must be one of: {", ".join(CATEGORIES)}'
+EXPORT_CHUNK_SIZE = 1000  # rows fetched from the database cursor per streamed chunk
+IMPORT_BATCH_SIZE = 5000  # rows inserted per import transaction
+MAX_IMPORT_ERRORS = 1000  # row errors reported back from one import
+SUMMARY_CACHE_TTL = 300  # seconds a cached summary is served before it is recomputed
+SUMMARY_CACHE_MAX_BYTES = 1024 * 1024  # approximate memory budget for cached summaries
 
 # Database setup
-DATABASE_URL = "sqlite:///./expenses.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = "sqlite+aiosqlite:///./expenses.db"
+SYNC_DATABASE_URL = "sqlite:///./expenses.db"
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a write is in progress; busy_timeout makes
+    # writers wait for the lock instead of failing with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+def create_expense_engine(url: str):
+    """Async engine with the app's connection pool and SQLite settings.
+
+    aiosqlite defaults to NullPool, which opens a new connection (and thread)
+    per session; keep a pool of warm connections instead. There is no
+    pre-ping: a local SQLite file cannot drop a connection the way a network
+    database can, so the extra round trip per checkout would buy nothing.
+    """
+    async_engine = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=10,
+        max_overflow=10,
+        pool_timeout=30
+    )
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return async_engine
+
+engine = create_expense_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Synchronous engine, only used by the command-line tools
+sync_engine = create_engine(SYNC_DATABASE_URL, connect_args={"check_same_thread": False})
+
 Base = declarative_base()
 
 # Database Models
@@ -24,6 +102,40 @@ class ExpenseDB(Base):
     category = Column(String, nullable=False)
     description = Column(String, nullable=False)
     date = Column(Date, nullable=False)
+    
+    # Match the list access paths: date ranges, and category with optional date range,
+    # both ordered by date. SQLite appends the rowid (id) to every index entry.
+    __table_args__ = (
+        Index("ix_expenses_date", "date"),
+        Index("ix_expenses_category_date", "category", "date"),
+    )
+
+class ExpenseDailyTotalDB(Base):
+    """Per-day, per-category rollup of expenses, kept in step with every write"""
+    __tablename__ = "expense_daily_totals"
+    
+    date = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+class ExpenseDescriptionTotalDB(Base):
+    """Per-description, per-category, per-day rollup of expenses, kept in step
+    with every write; backs the top descriptions"""
+    __tablename__ = "expense_description_totals"
+    
+    description = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+    
+    # Stored in primary key order, so grouping by description reads the table
+    # in order instead of sorting it, and each write touches a single b-tree
+    __table_args__ = {"sqlite_with_rowid": False}
+
+# Every rollup table, finest last; each is keyed by its primary key columns
+ROLLUPS = (ExpenseDailyTotalDB, ExpenseDescriptionTotalDB)
 
 # Pydantic Models
 class ExpenseBase(BaseModel):
@@ -34,9 +146,8 @@ class ExpenseBase(BaseModel):
 
     @field_validator('category')
     def validate_category(cls, v):
-        valid_categories = ['Food', 'Transport', 'Entertainment', 'Shopping', 'Bills', 'Healthcare', 'Other']
-        if v not in valid_categories:
-            raise ValueError(f'Category must be one of: {", ".join(valid_categories)}')
+        if v not in CATEGORY_SET:
+            raise ValueError(INVALID_CATEGORY)
         return v
 
 class ExpenseCreate(ExpenseBase):
@@ -46,14 +157,13 @@ class ExpenseUpdate(BaseModel):
     amount: Optional[float] = Field(None, gt=0)
     category: Optional[str] = None
     description: Optional[str] = None
-    date: Optional[date] = None
+    # Spelled dt.date because the field name shadows `date` inside the class body
+    date: Optional[dt.date] = None
 
     @field_validator('category')
     def validate_category(cls, v):
-        if v is not None:
-            valid_categories = ['Food', 'Transport', 'Entertainment', 'Shopping', 'Bills', 'Healthcare', 'Other']
-            if v not in valid_categories:
-                raise ValueError(f'Category must be one of: {", ".join(valid_categories)}')
+        if v is not None and v not in CATEGORY_SET:
+            raise ValueError(INVALID_CATEGORY)
         return v
 
 class Expense(ExpenseBase):
@@ -66,71 +176,459 @@ class ExpenseTotal(BaseModel):
     total: float
     breakdown: dict
 
+class ExpenseSeries(BaseModel):
+    """Columnar time series: the i-th entry of every list describes one bucket"""
+    period: str
+    window: int
+    bucket: List[date]
+    category: Optional[List[str]] = None
+    total: List[float]
+    count: List[int]
+    running_total: List[float]
+    moving_average: List[float]
+
+class TopDescriptions(BaseModel):
+    description: List[str]
+    total: List[float]
+    count: List[int]
+
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    ttl_seconds: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
 # Database dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+def expense_filters(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None
+) -> list:
+    """Build the WHERE conditions shared by the expense list queries"""
+    conditions = []
+    if category:
+        conditions.append(ExpenseDB.category == category)
+    if start_date:
+        conditions.append(ExpenseDB.date >= start_date)
+    if end_date:
+        conditions.append(ExpenseDB.date <= end_date)
+    return conditions
 
-# FastAPI app
-app = FastAPI(title="Expense Tracker", description="Track your expenses with categories and analytics")
+def expense_list_query(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    after: Optional[Tuple[date, int]] = None
+):
+    """SELECT used by every expense list, newest first.
 
-# Set up templates and static files
-templates = Jinja2Templates(directory="templates")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    Lists are ordered by (date, id) so that after, the key of the last row of
+    the previous page, can seek straight to the next page through the index.
+    """
+    conditions = expense_filters(start_date, end_date, category)
+    if after:
+        conditions.append(tuple_(ExpenseDB.date, ExpenseDB.id) < tuple_(*after))
+    return select(ExpenseDB).filter(*conditions).order_by(ExpenseDB.date.desc(), ExpenseDB.id.desc())
 
-# Initialize sample data
-def init_sample_data():
-    db = SessionLocal()
+def encode_cursor(expense: ExpenseDB) -> str:
+    """Opaque cursor pointing just past the given expense"""
+    key = f"{expense.date.isoformat()}|{expense.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
     try:
-        # Check if data already exists
-        existing_expenses = db.query(ExpenseDB).first()
-        if existing_expenses:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        expense_date, expense_id = key.split("|")
+        return date.fromisoformat(expense_date), int(expense_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_expense_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None
+):
+    """Return one page of expenses and the cursor for the next page (None on the last page)"""
+    after = decode_cursor(cursor) if cursor else None
+    if category and category not in CATEGORY_SET:
+        return [], None
+    query = expense_list_query(start_date, end_date, category, after).limit(limit + 1)
+    expenses = (await db.scalars(query)).all()
+    if len(expenses) > limit:
+        return expenses[:limit], encode_cursor(expenses[limit - 1])
+    return expenses, None
+
+def rollup_filters(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    rollup=ExpenseDailyTotalDB
+) -> list:
+    """expense_filters, for queries against one of the ROLLUPS"""
+    conditions = []
+    if category:
+        conditions.append(rollup.category == category)
+    if start_date:
+        conditions.append(rollup.date >= start_date)
+    if end_date:
+        conditions.append(rollup.date <= end_date)
+    return conditions
+
+async def expense_summary(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None
+):
+    """Return the total, per-category breakdown and number of expenses, read
+    from the daily rollups.
+
+    The cost is proportional to the number of (day, category) pairs in the
+    range rather than the number of expenses.
+    """
+    conditions = rollup_filters(start_date, end_date, category)
+    breakdown_query = await db.execute(
+        select(
+            ExpenseDailyTotalDB.category,
+            func.sum(ExpenseDailyTotalDB.total),
+            func.sum(ExpenseDailyTotalDB.count)
+        )
+        .filter(*conditions)
+        .group_by(ExpenseDailyTotalDB.category)
+    )
+    breakdown = {}
+    count = 0
+    for category, amount, category_count in breakdown_query:
+        breakdown[category] = float(amount)
+        count += category_count
+    return float(sum(breakdown.values())), breakdown, count
+
+def rollup_keys(rollup) -> List[str]:
+    return [column.name for column in rollup.__table__.primary_key]
+
+def rollup_totals(rollup, *conditions):
+    """SELECT of the total and count per `rollup` key over the expenses matching conditions"""
+    keys = [getattr(ExpenseDB, name) for name in rollup_keys(rollup)]
+    return (
+        select(*keys, func.sum(ExpenseDB.amount), func.count(ExpenseDB.id))
+        .filter(*conditions)
+        .group_by(*keys)
+    )
+
+def rollup_upsert(rollup=ExpenseDailyTotalDB, totals=None):
+    """INSERT ... ON CONFLICT statement that adds its values, or the rows of a
+    rollup_totals select, onto an existing total in `rollup`"""
+    statement = sqlite_insert(rollup)
+    if totals is not None:
+        statement = statement.from_select([*rollup_keys(rollup), "total", "count"], totals)
+    return statement.on_conflict_do_update(
+        index_elements=rollup_keys(rollup),
+        set_={
+            "total": rollup.total + statement.excluded.total,
+            "count": rollup.count + statement.excluded.count
+        }
+    )
+
+async def adjust_rollup(
+    db: AsyncSession, expense_date: date, category: str, description: str, amount: float, count: int
+):
+    """Add amount and count to the expense's total in every rollup, in the caller's transaction"""
+    key = {"date": expense_date, "category": category, "description": description}
+    for rollup in ROLLUPS:
+        values = {name: key[name] for name in rollup_keys(rollup)}
+        await db.execute(rollup_upsert(rollup).values(**values, total=amount, count=count))
+        if count < 0:
+            await db.execute(
+                delete(rollup).where(
+                    *(getattr(rollup, name) == value for name, value in values.items()),
+                    rollup.count <= 0
+                )
+            )
+
+def rebuild_rollups(connection: Connection):
+    """Recompute every rollup from the expenses table, e.g. after a backfill"""
+    for rollup in ROLLUPS:
+        connection.execute(delete(rollup))
+        connection.execute(
+            insert(rollup).from_select([*rollup_keys(rollup), "total", "count"], rollup_totals(rollup))
+        )
+
+# Summary cache
+SummaryKey = Tuple[Optional[date], Optional[date], Optional[str]]
+
+class SummaryCache:
+    """LRU cache of expense_summary results keyed by (start_date, end_date, category).
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once their estimated size passes `max_bytes`. Writes drop exactly
+    the entries whose date range and category cover the changed expense.
+
+    The cache is per process: with several workers, a write only invalidates
+    the worker that handled it and the others catch up within `ttl`.
+    """
+    
+    def __init__(self, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[SummaryKey, Tuple[float, int, tuple]]" = OrderedDict()
+        self.bytes = 0
+        # Bumped by every invalidation so a summary computed before a write
+        # that committed mid-query is not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def estimate_size(key: SummaryKey, summary: tuple) -> int:
+        _, breakdown, _ = summary
+        size = sys.getsizeof(key) + sys.getsizeof(summary) + sys.getsizeof(breakdown) + 64 * len(breakdown)
+        return size + sum(sys.getsizeof(part) for part in key if part is not None)
+    
+    def get(self, key: SummaryKey) -> Optional[tuple]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self.discard(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+    
+    def put(self, key: SummaryKey, summary: tuple, generation: int):
+        if generation != self.generation:
             return
-        
-        # Add sample expenses
-        sample_expenses = [
-            ExpenseDB(amount=25.50, category="Food", description="Lunch at restaurant", date=date(2024, 1, 15)),
-            ExpenseDB(amount=15.00, category="Transport", description="Bus fare", date=date(2024, 1, 16)),
-            ExpenseDB(amount=89.99, category="Shopping", description="Groceries", date=date(2024, 1, 17)),
-            ExpenseDB(amount=45.00, category="Entertainment", description="Movie tickets", date=date(2024, 1, 18)),
-            ExpenseDB(amount=120.00, category="Bills", description="Internet bill", date=date(2024, 1, 19)),
-            ExpenseDB(amount=75.00, category="Healthcare", description="Doctor visit", date=date(2024, 1, 20)),
+        self.discard(key)
+        size = self.estimate_size(key, summary)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, size, summary)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self.discard(next(iter(self.entries)))
+            self.evictions += 1
+    
+    def discard(self, key: SummaryKey):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+    
+    def invalidate(self, first: date, last: date, category: str):
+        """Drop the summaries that include expenses of `category` dated between first and last"""
+        self.generation += 1
+        stale = [
+            key for key in self.entries
+            if (key[0] is None or key[0] <= last)
+            and (key[1] is None or key[1] >= first)
+            and (key[2] is None or key[2] == category)
         ]
-        
-        db.add_all(sample_expenses)
-        db.commit()
+        for key in stale:
+            self.discard(key)
+        self.invalidations += len(stale)
+    
+    def clear(self):
+        """Drop every summary, as after a write that touches them all"""
+        self.generation += 1
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+        self.bytes = 0
+    
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            entries=len(self.entries),
+            bytes=self.bytes,
+            max_bytes=self.max_bytes,
+            ttl_seconds=self.ttl,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            invalidations=self.invalidations
+        )
+
+summary_cache = SummaryCache(SUMMARY_CACHE_TTL, SUMMARY_CACHE_MAX_BYTES)
+
+async def cached_expense_summary(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None
+):
+    """expense_summary, served from summary_cache when possible"""
+    # "All Categories" submits category= ; key it like no category at all, or
+    # invalidate(), which only clears keys whose category is None or matches,
+    # would never drop it
+    category = category or None
+    if category and category not in CATEGORY_SET:
+        # No expense can have an invalid category; don't spend cache space on it
+        return 0.0, {}, 0
+    key = (start_date, end_date, category)
+    summary = summary_cache.get(key)
+    if summary is None:
+        generation = summary_cache.generation
+        summary = await expense_summary(db, start_date, end_date, category)
+        summary_cache.put(key, summary, generation)
+    total, breakdown, count = summary
+    # Hand out a copy so callers cannot mutate the cached breakdown
+    return total, dict(breakdown), count
+
+# Schema setup
+# Bump whenever the tables, indexes or triggers change: databases recording an
+# older version in PRAGMA user_version are migrated on their next start, and
+# databases already at this version skip setup entirely
+SCHEMA_VERSION = 3
+
+# create_all skips tables that already exist, so add indexes introduced since
+# an existing expenses.db was created
+def migrate_indexes(connection: Connection):
+    for index in ExpenseDB.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+# Full-text index over expense descriptions. It is an external-content FTS5
+# table: it stores only the index and reads descriptions back from expenses,
+# and the triggers below keep it in step with every insert, update and delete
+expenses_fts = table("expenses_fts", column("rowid"), column("description"), column("rank"))
+
+SEARCH_INSERT_TRIGGER = """CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description);
+    END"""
+
+SEARCH_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        description, content='expenses', content_rowid='id', tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )""",
+    SEARCH_INSERT_TRIGGER,
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_fts(rowid, description) VALUES (new.id, new.description);
+    END""",
+]
+
+def rebuild_search_index(connection: Connection):
+    """Re-index every description, e.g. after expenses were written with the triggers missing"""
+    connection.execute(text("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')"))
+
+def migrate_search(connection: Connection):
+    definition = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'expenses_fts'")
+    ).scalar()
+    # Search tables from before the prefix indexes can't gain them in place
+    if definition is not None and "prefix=" not in definition:
+        connection.execute(text("DROP TABLE expenses_fts"))
+        definition = None
+    for statement in SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    # Index the expenses that were written before the search table existed
+    if definition is None:
+        rebuild_search_index(connection)
+
+SAMPLE_EXPENSES = [
+    {"amount": 25.50, "category": "Food", "description": "Lunch at restaurant", "date": date(2024, 1, 15)},
+    {"amount": 15.00, "category": "Transport", "description": "Bus fare", "date": date(2024, 1, 16)},
+    {"amount": 89.99, "category": "Shopping", "description": "Groceries", "date": date(2024, 1, 17)},
+    {"amount": 45.00, "category": "Entertainment", "description": "Movie tickets", "date": date(2024, 1, 18)},
+    {"amount": 120.00, "category": "Bills", "description": "Internet bill", "date": date(2024, 1, 19)},
+    {"amount": 75.00, "category": "Healthcare", "description": "Doctor visit", "date": date(2024, 1, 20)},
+]
+
+def prepare_database(connection: Connection) -> bool:
+    """Create or migrate the schema and seed sample data into an empty database.
+
+    Returns False without touching anything when the database is already at
+    SCHEMA_VERSION, which costs a single PRAGMA read.
+    """
+    version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    if version == SCHEMA_VERSION:
+        return False
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"expenses.db has schema version {version}, newer than this app's {SCHEMA_VERSION}")
+    
+    Base.metadata.create_all(bind=connection)
+    migrate_indexes(connection)
+    migrate_search(connection)
+    
+    if connection.execute(select(ExpenseDB.id).limit(1)).first() is None:
+        connection.execute(insert(ExpenseDB), SAMPLE_EXPENSES)
         print("Sample data initialized!")
-    except Exception as e:
-        print(f"Error initializing sample data: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    # Backfill the rollups for databases created before they existed
+    if any(connection.execute(select(rollup.date).limit(1)).first() is None for rollup in ROLLUPS):
+        rebuild_rollups(connection)
+        print("Expense rollups rebuilt!")
+    
+    connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return True
+
+# FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker before it serves; after the first start this is a
+    # single PRAGMA read. Run `python main.py init-db` before starting several
+    # workers against a new database so they don't race to create it
+    async with engine.begin() as connection:
+        await connection.run_sync(prepare_database)
+    yield
+    await engine.dispose()
 
-# Initialize sample data on startup
-init_sample_data()
+app = FastAPI(
+    title="Expense Tracker",
+    description="Track your expenses with categories and analytics",
+    lifespan=lifespan
+)
+
+# Set up templates and static files
+templates = Jinja2Templates(directory="templates")
+templates.env.globals["categories"] = CATEGORIES
+templates.env.globals["category_badges"] = CATEGORY_BADGES
+app.mount("/static", StaticFiles(directory="static"), name="static")
+
+@lru_cache(maxsize=SUMMARY_FRAGMENT_CACHE_SIZE)
+def render_summary(total: float, count: int, breakdown: Tuple[Tuple[str, float], ...]) -> Markup:
+    """Render the summary cards and category breakdown.
+
+    Keyed on the figures themselves, so a cached fragment can never be stale:
+    once the summary changes it simply stops being looked up.
+    """
+    return Markup(templates.get_template("_summary.html").render(total=total, count=count, breakdown=dict(breakdown)))
 
 # API Endpoints
 @app.get("/expenses", response_model=List[Expense])
 async def get_expenses(
+    response: Response,
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Maximum number of expenses to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Fetch all expenses with optional date range filtering"""
-    query = db.query(ExpenseDB)
-    
-    if start_date:
-        query = query.filter(ExpenseDB.date >= start_date)
-    if end_date:
-        query = query.filter(ExpenseDB.date <= end_date)
-    
-    expenses = query.order_by(ExpenseDB.date.desc()).all()
+    """Fetch expenses newest first with optional date range filtering, one page at a time"""
+    expenses, next_cursor = await fetch_expense_page(db, limit, cursor, start_date, end_date)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return expenses
 
 @app.post("/expenses", response_model=Expense, status_code=201)
@@ -139,7 +637,7 @@ async def create_expense(
     category: str = Form(...),
     description: str = Form(...),
     expense_date: date = Form(..., alias="date"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new expense"""
     try:
@@ -153,110 +651,499 @@ async def create_expense(
         
         db_expense = ExpenseDB(**expense_data.dict())
         db.add(db_expense)
-        db.commit()
-        db.refresh(db_expense)
+        await adjust_rollup(db, db_expense.date, db_expense.category, db_expense.description, db_expense.amount, 1)
+        await db.commit()
+        summary_cache.invalidate(db_expense.date, db_expense.date, db_expense.category)
+        await db.refresh(db_expense)
         return db_expense
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to create expense")
 
 @app.put("/expenses/{expense_id}", response_model=Expense)
 async def update_expense(
     expense_id: int,
     expense_update: ExpenseUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing expense"""
-    db_expense = db.query(ExpenseDB).filter(ExpenseDB.id == expense_id).first()
+    db_expense = await db.get(ExpenseDB, expense_id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
     update_data = expense_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_expense, field, value)
     
     try:
-        db.commit()
-        db.refresh(db_expense)
+        # Move the expense out of its old rollup and into the new one in the same transaction
+        old_date, old_category = db_expense.date, db_expense.category
+        await adjust_rollup(db, db_expense.date, db_expense.category, db_expense.description, -db_expense.amount, -1)
+        for field, value in update_data.items():
+            setattr(db_expense, field, value)
+        await adjust_rollup(db, db_expense.date, db_expense.category, db_expense.description, db_expense.amount, 1)
+        await db.commit()
+        summary_cache.invalidate(old_date, old_date, old_category)
+        summary_cache.invalidate(db_expense.date, db_expense.date, db_expense.category)
+        await db.refresh(db_expense)
         return db_expense
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update expense")
 
 @app.delete("/expenses/{expense_id}")
-async def delete_expense(expense_id: int, db: Session = Depends(get_db)):
+async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_db)):
     """Delete an expense"""
-    db_expense = db.query(ExpenseDB).filter(ExpenseDB.id == expense_id).first()
+    db_expense = await db.get(ExpenseDB, expense_id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
     try:
-        db.delete(db_expense)
-        db.commit()
+        await db.delete(db_expense)
+        await adjust_rollup(db, db_expense.date, db_expense.category, db_expense.description, -db_expense.amount, -1)
+        await db.commit()
+        summary_cache.invalidate(db_expense.date, db_expense.date, db_expense.category)
         return {"message": "Expense deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete expense")
 
 @app.get("/expenses/category/{category}", response_model=List[Expense])
-async def get_expenses_by_category(category: str, db: Session = Depends(get_db)):
-    """Filter expenses by category"""
-    expenses = db.query(ExpenseDB).filter(ExpenseDB.category == category).order_by(ExpenseDB.date.desc()).all()
+async def get_expenses_by_category(
+    category: str,
+    response: Response,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Maximum number of expenses to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Filter expenses by category, one page at a time"""
+    expenses, next_cursor = await fetch_expense_page(db, limit, cursor, category=category)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return expenses
 
 @app.get("/expenses/total", response_model=ExpenseTotal)
 async def get_total_expenses(
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get total expenses and breakdown by category"""
-    query = db.query(ExpenseDB)
+    total, breakdown, _ = await cached_expense_summary(db, start_date, end_date)
+    return ExpenseTotal(total=total, breakdown=breakdown)
+
+@app.get("/expenses/total/cache", response_model=CacheStats)
+async def get_summary_cache_stats():
+    """Hit/miss counters and size of the summary cache, for monitoring"""
+    return summary_cache.stats()
+
+# Search
+SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+def search_match_expression(q: str) -> str:
+    """Turn a user query into an FTS5 MATCH expression.
+
+    "quoted words" match as a phrase, a trailing * matches any word with that
+    prefix and all terms must match. Every term is quoted, so FTS5 operators
+    and punctuation in the query are searched for rather than interpreted.
+    """
+    terms = []
+    for phrase, word in SEARCH_TERM.findall(q):
+        prefix = not phrase and word.endswith("*")
+        term = (phrase or word.rstrip("*")).replace('"', '""')
+        if term.strip():
+            terms.append(f'"{term}" *' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+@app.get("/expenses/search", response_model=List[Expense])
+async def search_expenses(
+    q: str = Query(..., min_length=1, description='Words to find; use "..." for a phrase and word* for a prefix'),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    category: Optional[str] = Query(None, description="Only include this category"),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=MAX_LIMIT, description="Maximum number of expenses to return"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over expense descriptions, best matches first.
+
+    Only the newest SEARCH_CANDIDATES matches (or offset + limit, if more) are
+    ranked: bm25 is computed for every row the ranked query visits, which made
+    common words cost hundreds of milliseconds. The oldest candidate is found
+    first by walking the matches newest first without ranking them.
+    """
+    match = search_match_expression(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    conditions = [expenses_fts.c.description.match(match), *expense_filters(start_date, end_date, category)]
+    oldest_candidate = await db.scalar(
+        select(ExpenseDB.id)
+        .join(expenses_fts, expenses_fts.c.rowid == ExpenseDB.id)
+        .filter(*conditions)
+        .order_by(expenses_fts.c.rowid.desc())
+        .offset(max(SEARCH_CANDIDATES, offset + limit) - 1)
+        .limit(1)
+    )
+    if oldest_candidate is not None:
+        conditions.append(expenses_fts.c.rowid >= oldest_candidate)
+    query = (
+        select(ExpenseDB)
+        .join(expenses_fts, expenses_fts.c.rowid == ExpenseDB.id)
+        .filter(*conditions)
+        .order_by(expenses_fts.c.rank, ExpenseDB.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return (await db.scalars(query)).all()
+
+# Analytics
+# SQLite expressions mapping a date to the first day of its bucket, and the
+# modifier that steps from one bucket to the next; weeks start on Monday
+PERIOD_BUCKETS = {
+    "month": lambda column: func.strftime("%Y-%m-01", column),
+    "week": lambda column: func.date(column, "-6 days", "weekday 1")
+}
+PERIOD_STEPS = {"month": "+1 month", "week": "+7 days"}
+
+def expense_series_query(
+    period: str,
+    window: int,
+    by_category: bool,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None
+):
+    """Bucket the daily rollups by period, then add running totals and moving
+    averages with window functions, all in one SQL statement.
+
+    Buckets without expenses still count: a recursive CTE generates every
+    bucket from the first to the last one with expenses, each series is
+    left-joined onto that calendar, and the gaps become zero-valued rows.
+    Otherwise a window over rows would reach back past the empty buckets and
+    average in older ones.
+    """
+    conditions = rollup_filters(start_date, end_date, category)
+    bucket = PERIOD_BUCKETS[period]
+    keys = [bucket(ExpenseDailyTotalDB.date).label("bucket")]
+    if by_category:
+        keys.append(ExpenseDailyTotalDB.category)
+    buckets = (
+        select(
+            *keys,
+            func.sum(ExpenseDailyTotalDB.total).label("total"),
+            func.sum(ExpenseDailyTotalDB.count).label("count")
+        )
+        .filter(*conditions)
+        .group_by(*keys)
+        .cte("buckets")
+    )
     
-    if start_date:
-        query = query.filter(ExpenseDB.date >= start_date)
-    if end_date:
-        query = query.filter(ExpenseDB.date <= end_date)
+    bounds = (
+        select(
+            bucket(func.min(ExpenseDailyTotalDB.date)).label("first"),
+            bucket(func.max(ExpenseDailyTotalDB.date)).label("last")
+        )
+        .filter(*conditions)
+        .cte("bounds")
+    )
+    calendar = select(bounds.c.first.label("bucket")).where(bounds.c.first.is_not(None)).cte("calendar", recursive=True)
+    following = func.date(calendar.c.bucket, PERIOD_STEPS[period])
+    calendar = calendar.union_all(
+        select(following).join_from(calendar, bounds, true()).where(following <= bounds.c.last)
+    )
+    
+    if by_category:
+        categories = select(buckets.c.category).distinct().subquery()
+        grid = select(calendar.c.bucket, categories.c.category).join_from(calendar, categories, true()).subquery()
+        keys = [grid.c.bucket, grid.c.category]
+        on = (buckets.c.bucket == grid.c.bucket) & (buckets.c.category == grid.c.category)
+    else:
+        grid = calendar
+        keys = [grid.c.bucket]
+        on = buckets.c.bucket == grid.c.bucket
+    total = func.coalesce(buckets.c.total, 0.0)
+    partition = grid.c.category if by_category else None
+    return (
+        select(
+            *keys,
+            total,
+            func.coalesce(buckets.c["count"], 0),
+            func.sum(total).over(partition_by=partition, order_by=grid.c.bucket, rows=(None, 0)),
+            func.avg(total).over(partition_by=partition, order_by=grid.c.bucket, rows=(-(window - 1), 0))
+        )
+        .select_from(grid.outerjoin(buckets, on))
+        .order_by(*reversed(keys))
+    )
+
+@app.get("/expenses/analytics/series", response_model=ExpenseSeries, response_model_exclude_none=True)
+async def get_expense_series(
+    period: str = Query("month", pattern="^(month|week)$", description="month or week"),
+    window: int = Query(3, ge=1, le=52, description="Number of buckets in the moving average"),
+    by_category: bool = Query(True, description="One series per category instead of a single combined one"),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    category: Optional[str] = Query(None, description="Only include this category"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Monthly or weekly totals with running totals and moving averages, as columns.
+
+    Computed from the daily rollups, so the cost depends on the number of days
+    and categories in the range rather than the number of expenses.
+    """
+    rows = (await db.execute(
+        expense_series_query(period, window, by_category, start_date, end_date, category)
+    )).all()
+    columns = list(zip(*rows)) or [()] * (6 if by_category else 5)
+    if by_category:
+        buckets, categories, totals, counts, running_totals, moving_averages = columns
+    else:
+        buckets, totals, counts, running_totals, moving_averages = columns
+        categories = None
+    return ExpenseSeries(
+        period=period,
+        window=window,
+        bucket=buckets,
+        category=categories,
+        total=[round(value, 2) for value in totals],
+        count=counts,
+        running_total=[round(value, 2) for value in running_totals],
+        moving_average=[round(value, 2) for value in moving_averages]
+    )
+
+@app.get("/expenses/analytics/top", response_model=TopDescriptions)
+async def get_top_descriptions(
+    n: int = Query(10, ge=1, le=100, description="Number of descriptions to return"),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    category: Optional[str] = Query(None, description="Only include this category"),
+    db: AsyncSession = Depends(get_db)
+):
+    """The descriptions with the highest total spend, as columns, summed from
+    the per-description daily rollups"""
+    spent = func.sum(ExpenseDescriptionTotalDB.total)
+    rows = (await db.execute(
+        select(ExpenseDescriptionTotalDB.description, spent, func.sum(ExpenseDescriptionTotalDB.count))
+        .filter(*rollup_filters(start_date, end_date, category, ExpenseDescriptionTotalDB))
+        .group_by(ExpenseDescriptionTotalDB.description)
+        .order_by(spent.desc())
+        .limit(n)
+    )).all()
+    descriptions, totals, counts = list(zip(*rows)) or [(), (), ()]
+    return TopDescriptions(
+        description=descriptions,
+        total=[round(value, 2) for value in totals],
+        count=counts
+    )
+
+# Import / Export
+EXPORT_COLUMNS = ["id", "date", "category", "description", "amount"]
+
+async def export_rows(
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category: Optional[str],
+    export_format: str
+):
+    """Yield the export body in chunks, streaming rows from a server-side cursor.
+
+    The session is opened here rather than through get_db because it has to
+    stay open until the last chunk has been sent.
+    """
+    query = (
+        select(*(getattr(ExpenseDB, column) for column in EXPORT_COLUMNS))
+        .filter(*expense_filters(start_date, end_date, category))
+        .order_by(ExpenseDB.date, ExpenseDB.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
     
-    # Calculate total
-    total = query.with_entities(func.sum(ExpenseDB.amount)).scalar() or 0.0
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows((row.id, row.date.isoformat(), row.category, row.description, row.amount) for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({
+                        "id": row.id,
+                        "date": row.date.isoformat(),
+                        "category": row.category,
+                        "description": row.description,
+                        "amount": row.amount
+                    }) + "\n"
+                    for row in rows
+                )
+
+@app.get("/expenses/export")
+async def export_expenses(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    category: Optional[str] = Query(None, description="Category to export"),
+):
+    """Stream matching expenses, oldest first, as CSV or newline-delimited JSON"""
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_rows(start_date, end_date, category, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="expenses.{export_format}"'}
+    )
+
+def parse_import_rows(file, import_format: str):
+    """Yield (row number, raw record) pairs, reading the upload incrementally"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, record
+
+def describe_validation_errors(details: List[dict]) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in details
+    )
+
+IMPORT_ROWS = TypeAdapter(List[ExpenseCreate])
+
+def validate_import_batch(rows: Iterator[Tuple[int, object]]) -> Tuple[List[dict], List[ImportRowError], int]:
+    """Read up to IMPORT_BATCH_SIZE rows and validate them as one list.
+
+    Returns the valid expenses, an error for every invalid row and how many
+    rows were read. Blocking; the import runs it in a worker thread.
+    """
+    numbers, records = [], []
+    errors: Dict[int, str] = {}
+    read = 0
+    for row_number, record in itertools.islice(rows, IMPORT_BATCH_SIZE):
+        read += 1
+        if isinstance(record, dict):
+            numbers.append(row_number)
+            records.append(record)
+        else:
+            errors[row_number] = "Row is not a JSON object"
+    try:
+        expenses = IMPORT_ROWS.validate_python(records)
+    except ValidationError as e:
+        # Report the failing rows, then validate the rest again without them
+        invalid: Dict[int, List[dict]] = {}
+        for detail in e.errors():
+            invalid.setdefault(detail["loc"][0], []).append({**detail, "loc": detail["loc"][1:]})
+        for index, details in invalid.items():
+            errors[numbers[index]] = describe_validation_errors(details)
+        expenses = IMPORT_ROWS.validate_python([record for index, record in enumerate(records) if index not in invalid])
+    return (
+        [expense.model_dump() for expense in expenses],
+        [ImportRowError(row=row, error=message) for row, message in sorted(errors.items())],
+        read
+    )
+
+async def insert_import_batch(db: AsyncSession, batch: List[dict]):
+    """Insert a batch of validated expenses, index them for search and fold
+    them into the rollups, in one transaction.
+
+    The search insert trigger is dropped for the batch and the new rows are
+    indexed with a single INSERT ... SELECT instead: fired per row, the
+    trigger makes FTS5 flush its index at every row's savepoint, which was
+    most of the cost of an import. Dropping the trigger is the transaction's
+    first write, so it holds the write lock until the trigger is back and
+    no other connection can insert in between. The rollups are likewise
+    summed from the new rows in SQL rather than upserted row by row.
+    """
+    try:
+        connection = await db.connection()
+        await connection.exec_driver_sql("DROP TRIGGER expenses_fts_insert")
+        last_id = (await connection.execute(select(func.coalesce(func.max(ExpenseDB.id), 0)))).scalar()
+        await connection.execute(insert(ExpenseDB.__table__), batch)
+        await connection.execute(
+            text("INSERT INTO expenses_fts(rowid, description) SELECT id, description FROM expenses WHERE id > :last_id"),
+            {"last_id": last_id}
+        )
+        await connection.exec_driver_sql(SEARCH_INSERT_TRIGGER)
+        for rollup in ROLLUPS:
+            await connection.execute(rollup_upsert(rollup, rollup_totals(rollup, ExpenseDB.id > last_id)))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
     
-    # Calculate breakdown by category
-    breakdown_query = query.with_entities(
-        ExpenseDB.category,
-        func.sum(ExpenseDB.amount).label('total')
-    ).group_by(ExpenseDB.category).all()
+    # One invalidation per category, spanning the batch's dates
+    date_ranges: Dict[str, Tuple[date, date]] = {}
+    for expense in batch:
+        expense_date, category = expense["date"], expense["category"]
+        first, last = date_ranges.get(category, (expense_date, expense_date))
+        date_ranges[category] = (min(first, expense_date), max(last, expense_date))
+    for category, (first, last) in date_ranges.items():
+        summary_cache.invalidate(first, last, category)
+
+@app.post("/expenses/import", response_model=ImportResult)
+async def import_expenses(
+    file: UploadFile = File(..., description="CSV with amount, category, description and date columns, or NDJSON"),
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bulk import expenses, validating every row with the same rules as the API.
+
+    Rows are parsed and validated IMPORT_BATCH_SIZE at a time in a worker
+    thread, so a large upload does not block the event loop. Valid rows are
+    inserted a batch per transaction; invalid rows are skipped and reported
+    with their row number.
+    """
+    if import_format is None:
+        import_format = "ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv"
+    imported = 0
+    failed = 0
+    errors: List[ImportRowError] = []
+    rows = parse_import_rows(file.file, import_format)
     
-    breakdown = {category: float(total) for category, total in breakdown_query}
+    try:
+        read = IMPORT_BATCH_SIZE
+        while read == IMPORT_BATCH_SIZE:
+            batch, batch_errors, read = await run_in_threadpool(validate_import_batch, rows)
+            failed += len(batch_errors)
+            errors.extend(batch_errors[:MAX_IMPORT_ERRORS - len(errors)])
+            if batch:
+                await insert_import_batch(db, batch)
+                imported += len(batch)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse file after {imported} imported rows: {e}")
+    except Exception:
+        raise HTTPException(status_code=500, detail=f"Failed to import expenses after {imported} imported rows")
     
-    return ExpenseTotal(total=float(total), breakdown=breakdown)
+    return ImportResult(imported=imported, failed=failed, errors=errors)
 
 # Web UI Routes
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db)):
-    """Main page with expense form and list"""
-    expenses = db.query(ExpenseDB).order_by(ExpenseDB.date.desc()).all()
+async def home(request: Request, db: AsyncSession = Depends(get_db)):
+    """Main page with expense form and the first page of expenses"""
+    expenses, next_cursor = await fetch_expense_page(db, PAGE_SIZE)
     
     # Get total and breakdown
-    total = db.query(func.sum(ExpenseDB.amount)).scalar() or 0.0
-    breakdown_query = db.query(
-        ExpenseDB.category,
-        func.sum(ExpenseDB.amount).label('total')
-    ).group_by(ExpenseDB.category).all()
-    breakdown = {category: float(total) for category, total in breakdown_query}
-    
-    categories = ['Food', 'Transport', 'Entertainment', 'Shopping', 'Bills', 'Healthcare', 'Other']
+    total, breakdown, count = await cached_expense_summary(db)
     
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
             "expenses": expenses,
-            "total": float(total),
-            "breakdown": breakdown,
-            "categories": categories
+            "next_cursor": next_cursor,
+            "summary_html": render_summary(total, count, tuple(breakdown.items()))
         }
     )
 
@@ -266,44 +1153,72 @@ async def filter_expenses(
     category: Optional[str] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Filter expenses by category and date range"""
-    query = db.query(ExpenseDB)
-    
-    if category:
-        query = query.filter(ExpenseDB.category == category)
-    if start_date:
-        query = query.filter(ExpenseDB.date >= start_date)
-    if end_date:
-        query = query.filter(ExpenseDB.date <= end_date)
-    
-    expenses = query.order_by(ExpenseDB.date.desc()).all()
+    expenses, next_cursor = await fetch_expense_page(db, PAGE_SIZE, None, start_date, end_date, category)
     
     # Calculate filtered total and breakdown
-    total = query.with_entities(func.sum(ExpenseDB.amount)).scalar() or 0.0
-    breakdown_query = query.with_entities(
-        ExpenseDB.category,
-        func.sum(ExpenseDB.amount).label('total')
-    ).group_by(ExpenseDB.category).all()
-    breakdown = {category: float(total) for category, total in breakdown_query}
-    
-    categories = ['Food', 'Transport', 'Entertainment', 'Shopping', 'Bills', 'Healthcare', 'Other']
+    total, breakdown, count = await cached_expense_summary(db, start_date, end_date, category)
     
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
             "expenses": expenses,
-            "total": float(total),
-            "breakdown": breakdown,
-            "categories": categories,
+            "next_cursor": next_cursor,
+            "summary_html": render_summary(total, count, tuple(breakdown.items())),
             "selected_category": category,
             "start_date": start_date,
             "end_date": end_date
         }
     )
 
+@app.get("/filter/rows", response_class=HTMLResponse)
+async def filter_expense_rows(
+    request: Request,
+    cursor: str = Query(...),
+    category: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Table rows for the next page of the dashboard, fetched by its "Load more" button"""
+    expenses, next_cursor = await fetch_expense_page(db, PAGE_SIZE, cursor, start_date, end_date, category)
+    return templates.TemplateResponse(
+        "_expense_rows.html",
+        {"request": request, "expenses": expenses},
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None
+    )
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Expense Tracker")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="serve",
+        choices=["serve", "init-db", "rebuild-rollups", "rebuild-search-index"],
+        help="serve (default) runs the web app; init-db creates or migrates the database; "
+             "rebuild-rollups recomputes the daily and per-description totals; "
+             "rebuild-search-index re-indexes descriptions for search. "
+             "Checks and benchmarks are in bench.py"
+    )
+    args = parser.parse_args()
+    
+    if args.command != "serve":
+        with sync_engine.begin() as connection:
+            prepared = prepare_database(connection)
+    
+    if args.command == "init-db":
+        print(f"Database initialized at schema version {SCHEMA_VERSION}" if prepared else "Database is up to date")
+    elif args.command == "rebuild-rollups":
+        with sync_engine.begin() as connection:
+            rebuild_rollups(connection)
+        print("Expense rollups rebuilt!")
+    elif args.command == "rebuild-search-index":
+        with sync_engine.begin() as connection:
+            rebuild_search_index(connection)
+        print("Search index rebuilt!")
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8001)
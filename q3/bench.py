@@ -0,0 +1,613 @@
+"""Command-line checks and benchmarks for the ticket booking app in main.py.
+
+Every command builds a scratch database of its own in a temporary directory
+and calls the app's endpoint functions directly, so booking.db is never
+touched. Run it from this directory, like main.py:
+
+    python bench.py check-query-counts
+"""
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine, event, select, insert, func
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from pydantic import TypeAdapter
+from typing import List, Dict, Tuple
+from datetime import datetime
+from main import (
+    Base, Booking, BookingDB, BookingStatus, Event, EventDB, EventInventoryDB, TicketTypeDB, TicketTypeEnum, VenueDB,
+    DASHBOARD_PAGE_SIZE, HOLD_EXPIRY_BATCH, HOLD_EXPIRY_PAUSE, HOLD_TTL, MAX_SEARCH_LIMIT, SEARCH_LIMIT,
+    create_booking_engine, set_sqlite_pragmas, migrate_search, inventory_drift, rebuild_inventory,
+    database_locked, expire_holds, stats_cache, check_in, create_booking, search_bookings,
+    get_bookings, get_event_bookings, get_events, get_ticket_type_bookings, get_venue_events,
+    home, dashboard_stats, dashboard_bookings, dashboard_events, dashboard_venues, dashboard_ticket_types
+)
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+
+# Query-count check
+def page_request(path: str = "/") -> Request:
+    """A bare GET request for calling a page or fragment endpoint directly"""
+    return Request({"type": "http", "method": "GET", "path": path, "headers": []})
+
+def recomputed_stats(db: AsyncSession):
+    """Call dashboard_stats with its cache emptied, so that it queries"""
+    stats_cache.clear()
+    return dashboard_stats(page_request(), db=db)
+
+# List endpoints, each called with a session and paired with the response model
+# FastAPI serializes its result through (None for HTML pages)
+LIST_ENDPOINTS = {
+    "get_bookings": (lambda db: get_bookings(db=db), List[Booking]),
+    "get_event_bookings": (lambda db: get_event_bookings(1, db=db), List[Booking]),
+    "get_ticket_type_bookings": (lambda db: get_ticket_type_bookings(1, db=db), List[Booking]),
+    "search_bookings": (
+        lambda db: search_bookings(q="customer", event="Event", venue="Venue", ticket_type=None, limit=MAX_SEARCH_LIMIT, offset=0, db=db),
+        List[Booking]
+    ),
+    "get_events": (lambda db: get_events(db=db), List[Event]),
+    "get_venue_events": (lambda db: get_venue_events(1, db=db), List[Event]),
+    "home": (lambda db: home(page_request(), db=db), None),
+    "dashboard_stats": (recomputed_stats, None),
+    "dashboard_bookings": (lambda db: dashboard_bookings(page_request(), cursor=None, db=db), None),
+    "dashboard_events": (lambda db: dashboard_events(page_request(), cursor=None, db=db), None),
+    "dashboard_venues": (lambda db: dashboard_venues(page_request(), cursor=None, db=db), None),
+    "dashboard_ticket_types": (lambda db: dashboard_ticket_types(page_request(), cursor=None, db=db), None),
+}
+
+def scratch_database(directory: str):
+    """Sync and async engines on an empty database in `directory`, for the
+    command-line checks"""
+    sync_scratch = create_engine(f"sqlite:///{directory}/scratch.db")
+    Base.metadata.create_all(bind=sync_scratch)
+    with sync_scratch.begin() as connection:
+        migrate_search(connection)
+    async_scratch = create_booking_engine(f"sqlite+aiosqlite:///{directory}/scratch.db")
+    event.listen(async_scratch.sync_engine, "connect", set_sqlite_pragmas)
+    return sync_scratch, async_scratch
+
+async def list_query_counts(rows: int) -> Dict[str, object]:
+    """Count the SQL statements each list endpoint runs against a scratch
+    database holding `rows` bookings.
+
+    Even bookings share event 1 and odd ones ticket type 1, while every other
+    booking gets its own event, venue and ticket type, so a relationship that
+    is lazy-loaded per row shows up in every list. Under the async session a
+    lazy load fails outright, in which case the error is reported instead.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        with sessionmaker(bind=sync_scratch)() as db:
+            for i in range(1, rows + 1):
+                db.add(VenueDB(id=i, name=f"Venue {i}", location="Anywhere", capacity=100))
+                db.add(EventDB(id=i, name=f"Event {i}", description="Scratch event", date=datetime(2024, 1, 1), venue_id=i))
+                db.add(TicketTypeDB(id=i, name=TicketTypeEnum.STANDARD, price=10.0, description="Scratch ticket"))
+            for i in range(1, rows + 1):
+                db.add(BookingDB(
+                    event_id=1 if i % 2 == 0 else i,
+                    ticket_type_id=1 if i % 2 == 1 else i,
+                    customer_name=f"Customer {i}",
+                    customer_email=f"customer{i}@example.com",
+                    quantity=1,
+                    total_amount=10.0,
+                    status=BookingStatus.CONFIRMED,
+                    confirmation_code=f"CODE{i:04d}"
+                ))
+            db.commit()
+        sync_scratch.dispose()
+        
+        statements = 0
+        
+        @event.listens_for(async_scratch.sync_engine, "before_cursor_execute")
+        def count_statement(*args):
+            nonlocal statements
+            statements += 1
+        
+        ScratchSession = async_sessionmaker(async_scratch, autoflush=False, expire_on_commit=False)
+        counts = {}
+        for name, (call, response_model) in LIST_ENDPOINTS.items():
+            statements = 0
+            async with ScratchSession() as db:
+                try:
+                    result = await call(db)
+                    if response_model is not None:
+                        TypeAdapter(response_model).validate_python(result, from_attributes=True)
+                    counts[name] = statements
+                except Exception as e:
+                    counts[name] = f"failed with {type(e).__name__}: {e}"
+        await async_scratch.dispose()
+    return counts
+
+async def query_count_problems() -> List[str]:
+    """Report every list endpoint whose query count grows with the number of rows"""
+    small, large = await list_query_counts(4), await list_query_counts(40)
+    problems = []
+    for name in LIST_ENDPOINTS:
+        if isinstance(large[name], str):
+            problems.append(f"{name}: {large[name]}")
+        elif large[name] > small[name]:
+            problems.append(f"{name}: {small[name]} queries for 4 bookings, {large[name]} for 40")
+    return problems
+
+# Load test
+async def load_test(bookings: int, capacity: int) -> Dict[str, float]:
+    """Fire `bookings` concurrent create_booking calls at one event with
+    `capacity` seats in a scratch database, and report how many succeeded,
+    the seats they hold and the throughput"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        with sessionmaker(bind=sync_scratch)() as db:
+            db.add(VenueDB(id=1, name="Load Test Arena", location="Anywhere", capacity=capacity))
+            db.add(EventDB(id=1, name="Load Test", description="Scratch event", date=datetime(2024, 1, 1), venue_id=1))
+            db.add(TicketTypeDB(id=1, name=TicketTypeEnum.STANDARD, price=10.0, description="Scratch ticket"))
+            db.add(EventInventoryDB(event_id=1, capacity=capacity, reserved=0))
+            db.commit()
+        
+        ScratchSession = async_sessionmaker(async_scratch, autoflush=False, expire_on_commit=False)
+        
+        async def book(i: int) -> str:
+            async with ScratchSession() as db:
+                try:
+                    await create_booking(
+                        event_id=1,
+                        ticket_type_id=1,
+                        customer_name=f"Customer {i}",
+                        customer_email=f"customer{i}@example.com",
+                        quantity=1 + i % 4,
+                        db=db
+                    )
+                    return "booked"
+                except HTTPException as e:
+                    return "sold out" if e.status_code == 400 else "failed"
+                except Exception:
+                    return "failed"
+        
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(book(i) for i in range(bookings)))
+        elapsed = time.perf_counter() - started
+        await async_scratch.dispose()
+        
+        with sync_scratch.connect() as connection:
+            seats_booked = connection.execute(select(func.coalesce(func.sum(BookingDB.quantity), 0))).scalar()
+            seats_reserved = connection.execute(select(EventInventoryDB.reserved)).scalar()
+            inventory_errors = len(inventory_drift(connection))
+        sync_scratch.dispose()
+    
+    return {
+        "booked": outcomes.count("booked"),
+        "sold_out": outcomes.count("sold out"),
+        "failed": outcomes.count("failed"),
+        "seats_booked": seats_booked,
+        "seats_reserved": seats_reserved,
+        "inventory_errors": inventory_errors,
+        "bookings_per_second": bookings / elapsed
+    }
+
+# Check-in benchmark
+async def benchmark_checkin(checkins: int, bookings: int = 100000) -> Dict[str, float]:
+    """Scan `checkins` of `bookings` confirmed bookings' codes concurrently
+    at the door of a scratch event, then scan the same codes again, and
+    report admissions, rejections and scans per second for the first pass"""
+    bookings = max(bookings, checkins)
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        codes = [f"GATE{i:06d}" for i in range(bookings)]
+        with sync_scratch.begin() as connection:
+            connection.execute(insert(VenueDB), {"id": 1, "name": "Gate Arena", "location": "Anywhere", "capacity": bookings})
+            connection.execute(insert(EventDB), {
+                "id": 1, "name": "Gate Test", "description": "Scratch event", "date": datetime(2024, 1, 1), "venue_id": 1
+            })
+            connection.execute(insert(TicketTypeDB), {
+                "id": 1, "name": TicketTypeEnum.STANDARD, "price": 10.0, "description": "Scratch ticket"
+            })
+            connection.execute(insert(BookingDB), [
+                {
+                    "event_id": 1,
+                    "ticket_type_id": 1,
+                    "customer_name": f"Guest {i}",
+                    "customer_email": f"guest{i}@example.com",
+                    "quantity": 1,
+                    "total_amount": 10.0,
+                    "status": BookingStatus.CONFIRMED,
+                    "confirmation_code": code
+                }
+                for i, code in enumerate(codes)
+            ])
+        sync_scratch.dispose()
+        
+        ScratchSession = async_sessionmaker(async_scratch, autoflush=False, expire_on_commit=False)
+        
+        async def scan(code: str) -> str:
+            async with ScratchSession() as db:
+                try:
+                    await check_in(code, event_id=1, db=db)
+                    return "admitted"
+                except HTTPException as e:
+                    return "rejected" if e.status_code == 409 else "failed"
+                except Exception:
+                    return "failed"
+        
+        scanned = random.Random(0).sample(codes, checkins)
+        started = time.perf_counter()
+        first = await asyncio.gather(*(scan(code) for code in scanned))
+        elapsed = time.perf_counter() - started
+        second = await asyncio.gather(*(scan(code) for code in scanned))
+        await async_scratch.dispose()
+    
+    return {
+        "admitted": first.count("admitted"),
+        "admitted_twice": second.count("admitted"),
+        "rejected_rescans": second.count("rejected"),
+        "failed": first.count("failed") + second.count("failed"),
+        "scans_per_second": checkins / elapsed
+    }
+
+# Hold expiry benchmark
+async def benchmark_holds(holds: int, bookings: int = 1000) -> Dict[str, float]:
+    """Expire the lapsed half of `holds` pending bookings at a scratch event
+    the way the reaper does, while `bookings` new bookings arrive
+    concurrently, and report the expiry rate, the median batch (including
+    waits for the write lock), what a pass costs once nothing has lapsed,
+    and whether the inventory still matches"""
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        with sync_scratch.begin() as connection:
+            connection.execute(insert(VenueDB), {"id": 1, "name": "On-sale Arena", "location": "Anywhere", "capacity": 10 * (holds + bookings)})
+            connection.execute(insert(EventDB), {
+                "id": 1, "name": "On-sale", "description": "Scratch event", "date": datetime(2024, 1, 1), "venue_id": 1
+            })
+            connection.execute(insert(TicketTypeDB), [
+                {"id": i + 1, "name": name, "price": 10.0 * (i + 1), "description": name.value}
+                for i, name in enumerate(TicketTypeEnum)
+            ])
+            connection.execute(insert(BookingDB), [
+                {
+                    "event_id": 1,
+                    "ticket_type_id": rng.randint(1, len(TicketTypeEnum)),
+                    "customer_name": f"Fan {i}",
+                    "customer_email": f"fan{i}@example.com",
+                    "quantity": rng.randint(1, 4),
+                    "total_amount": 10.0,
+                    "status": BookingStatus.PENDING,
+                    "confirmation_code": f"HOLD{i:07d}",
+                    # Even holds lapsed within the last HOLD_TTL; odd ones lapse
+                    # in the second half of the next, well after the run
+                    "expires_at": now + HOLD_TTL * rng.uniform(0.5, 1) if i % 2 else now - HOLD_TTL * rng.random()
+                }
+                for i in range(holds)
+            ])
+            rebuild_inventory(connection)
+        sync_scratch.dispose()
+        lapsed = (holds + 1) // 2
+        
+        ScratchSession = async_sessionmaker(async_scratch, autoflush=False, expire_on_commit=False)
+        batch_ms = []
+        
+        async def reap():
+            expired = HOLD_EXPIRY_BATCH
+            async with ScratchSession() as db:
+                while expired == HOLD_EXPIRY_BATCH:
+                    started = time.perf_counter()
+                    try:
+                        expired = await expire_holds(db)
+                    except OperationalError as e:
+                        # Like reap_holds, leave the batch for the next pass
+                        if not database_locked(e):
+                            raise
+                        await db.rollback()
+                    batch_ms.append((time.perf_counter() - started) * 1000)
+                    await asyncio.sleep(HOLD_EXPIRY_PAUSE)
+        
+        async def book(i: int) -> str:
+            async with ScratchSession() as db:
+                try:
+                    await create_booking(
+                        event_id=1,
+                        ticket_type_id=1 + i % len(TicketTypeEnum),
+                        customer_name=f"Late fan {i}",
+                        customer_email=f"late{i}@example.com",
+                        quantity=1,
+                        db=db
+                    )
+                    return "booked"
+                except Exception:
+                    return "failed"
+        
+        started = time.perf_counter()
+        _, *outcomes = await asyncio.gather(reap(), *(book(i) for i in range(bookings)))
+        elapsed = time.perf_counter() - started
+        
+        async with ScratchSession() as db:
+            started = time.perf_counter()
+            await expire_holds(db)
+            idle_pass_ms = (time.perf_counter() - started) * 1000
+        await async_scratch.dispose()
+        
+        with sync_scratch.connect() as connection:
+            cancelled = connection.scalar(
+                select(func.count(BookingDB.id)).where(BookingDB.status == BookingStatus.CANCELLED)
+            )
+            inventory_errors = len(inventory_drift(connection))
+        sync_scratch.dispose()
+    
+    return {
+        "lapsed": lapsed,
+        "expired": cancelled,
+        "booked": outcomes.count("booked"),
+        "failed": outcomes.count("failed"),
+        "holds_per_second": cancelled / elapsed,
+        "median_batch_ms": sorted(batch_ms)[len(batch_ms) // 2],
+        "idle_pass_ms": idle_pass_ms,
+        "inventory_errors": inventory_errors
+    }
+
+# Search benchmark
+FIRST_NAMES = ("Ada", "Ben", "Cleo", "Dev", "Eva", "Finn", "Gus", "Hana", "Ivo", "Jade",
+               "Kai", "Lena", "Milo", "Nia", "Omar", "Pia", "Quin", "Rosa", "Sami", "Tess")
+SURNAME_SYLLABLES = ("ka", "ri", "to", "ne", "sa", "lu", "mo", "be", "di", "fa", "go", "hi")
+GENRES = ("Rock", "Jazz", "Opera", "Indie", "Folk", "Techno", "Blues", "Comedy", "Ballet", "Soul")
+SHOWS = ("Festival", "Night", "Tour", "Showcase", "Matinee")
+CITIES = ("Denver", "Austin", "Boston", "Chicago", "Seattle", "Portland", "Atlanta", "Phoenix", "Miami", "Dallas")
+VENUE_KINDS = ("Arena", "Hall", "Theatre", "Stadium", "Club")
+
+# name -> search_bookings arguments, filled in from a booking in the middle
+# of the data. The last query ranks a word that matches a tenth of all bookings
+SEARCH_BENCHMARK_QUERIES = {
+    "exact email": {"q": '"{email}"'},
+    "customer name": {"q": "{name}"},
+    "surname prefix": {"q": "{surname_prefix}*"},
+    "event filter": {"event": "{genre} festival"},
+    "one event": {"event": "{event_name}"},
+    "partial venue and ticket type": {"venue": "denv", "ticket_type": "vi"},
+    "name within event": {"q": "{surname}", "event": "{genre}"},
+    "common word, ranked": {"q": "{genre}"},
+}
+
+def add_synthetic_bookings(connection: Connection, bookings: int):
+    """Fill a scratch database with 50 venues, 2000 events, the ticket types
+    and `bookings` confirmed bookings spread over them at random"""
+    rng = random.Random(0)
+    surnames = [
+        (a + b + c).capitalize() for a in SURNAME_SYLLABLES for b in SURNAME_SYLLABLES for c in SURNAME_SYLLABLES
+    ]
+    connection.execute(insert(VenueDB), [
+        {"id": i + 1, "name": f"{city} {kind}", "location": city, "capacity": 10**6}
+        for i, (city, kind) in enumerate((city, kind) for city in CITIES for kind in VENUE_KINDS)
+    ])
+    connection.execute(insert(TicketTypeDB), [
+        {"id": i + 1, "name": name, "price": 10.0 * (i + 1), "description": name.value}
+        for i, name in enumerate(TicketTypeEnum)
+    ])
+    events = [
+        {"id": i + 1, "name": f"{genre} {show} {i // 50 + 1}", "description": "Scratch event",
+         "date": datetime(2024, 1, 1), "venue_id": i % 50 + 1}
+        for i, (genre, show) in enumerate(
+            (genre, show) for _ in range(40) for genre in GENRES for show in SHOWS
+        )
+    ]
+    connection.execute(insert(EventDB), events)
+    
+    for start in range(0, bookings, 50000):
+        rows = []
+        for i in range(start, min(start + 50000, bookings)):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(surnames)
+            rows.append({
+                "event_id": rng.randint(1, len(events)),
+                "ticket_type_id": rng.randint(1, len(TicketTypeEnum)),
+                "customer_name": f"{first} {last}",
+                "customer_email": f"{first}.{last}{i}@example.com".lower(),
+                "quantity": 1,
+                "total_amount": 10.0,
+                "status": BookingStatus.CONFIRMED,
+                "confirmation_code": f"BENCH{i}"
+            })
+        connection.execute(insert(BookingDB), rows)
+
+async def benchmark_search(bookings: int, repeats: int = 20) -> Dict[str, float]:
+    """Fill a scratch database with `bookings` synthetic bookings through the
+    search triggers and time each benchmark query, in median milliseconds per
+    call of search_bookings (one page, with its relationships loaded)"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        with sync_scratch.begin() as connection:
+            add_synthetic_bookings(connection, bookings)
+            name, email, event_name = connection.execute(
+                select(BookingDB.customer_name, BookingDB.customer_email, EventDB.name)
+                .join(EventDB, EventDB.id == BookingDB.event_id)
+                .where(BookingDB.id == bookings // 2 + 1)
+            ).one()
+        sync_scratch.dispose()
+        sample = {
+            "email": email,
+            "name": name,
+            "surname": name.split()[1],
+            "surname_prefix": name.split()[1][:5],
+            "genre": event_name.split()[0],
+            "event_name": event_name
+        }
+        
+        ScratchSession = async_sessionmaker(async_scratch, autoflush=False, expire_on_commit=False)
+        timings = {}
+        async with ScratchSession() as db:
+            for name, arguments in SEARCH_BENCHMARK_QUERIES.items():
+                arguments = {
+                    "q": None, "event": None, "venue": None, "ticket_type": None,
+                    **{key: value.format(**sample) for key, value in arguments.items()}
+                }
+                samples = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    await search_bookings(**arguments, limit=SEARCH_LIMIT, offset=0, db=db)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    db.expunge_all()
+                timings[name] = sorted(samples)[len(samples) // 2]
+        await async_scratch.dispose()
+    return timings
+
+# Dashboard benchmark
+# name -> (call of a page or fragment endpoint given a session and the number
+# of bookings, whether it must meet the time limit). Each is what one request
+# of the dashboard costs; the statistics are timed with the cache emptied
+# first, which scans every booking and happens once per STATS_CACHE_TTL
+DASHBOARD_BENCHMARK_PAGES = {
+    "first paint (/)": (lambda db, bookings: home(page_request(), db=db), True),
+    "statistics, cached": (lambda db, bookings: dashboard_stats(page_request(), db=db), True),
+    "statistics, recomputed": (lambda db, bookings: recomputed_stats(db), False),
+    "bookings, page 2": (
+        lambda db, bookings: dashboard_bookings(page_request(), cursor=bookings - DASHBOARD_PAGE_SIZE + 1, db=db), True
+    ),
+    "bookings, middle page": (lambda db, bookings: dashboard_bookings(page_request(), cursor=bookings // 2, db=db), True),
+    "events": (lambda db, bookings: dashboard_events(page_request(), cursor=None, db=db), True),
+    "venues": (lambda db, bookings: dashboard_venues(page_request(), cursor=None, db=db), True),
+    "ticket types": (lambda db, bookings: dashboard_ticket_types(page_request(), cursor=None, db=db), True),
+}
+
+async def benchmark_dashboard(bookings: int, repeats: int = 20) -> Dict[str, Tuple[float, int]]:
+    """Time each dashboard request against a scratch database of `bookings`
+    synthetic bookings, as (median milliseconds, SQL statements) per call,
+    rendering included"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync_scratch, async_scratch = scratch_database(directory)
+        with sync_scratch.begin() as connection:
+            add_synthetic_bookings(connection, bookings)
+            rebuild_inventory(connection)
+        sync_scratch.dispose()
+        
+        statements = 0
+        
+        @event.listens_for(async_scratch.sync_engine, "before_cursor_execute")
+        def count_statement(*args):
+            nonlocal statements
+            statements += 1
+        
+        ScratchSession = async_sessionmaker(async_scratch, autoflush=False, expire_on_commit=False)
+        results = {}
+        for name, (call, _) in DASHBOARD_BENCHMARK_PAGES.items():
+            samples = []
+            for _ in range(repeats):
+                async with ScratchSession() as db:
+                    statements = 0
+                    started = time.perf_counter()
+                    await call(db, bookings)
+                    samples.append((time.perf_counter() - started) * 1000)
+            results[name] = (sorted(samples)[len(samples) // 2], statements)
+        await async_scratch.dispose()
+        stats_cache.clear()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ticket Booking System checks and benchmarks")
+    parser.add_argument(
+        "command",
+        choices=[
+            "check-query-counts", "load-test", "benchmark-search", "benchmark-checkin",
+            "benchmark-holds", "benchmark-dashboard"
+        ],
+        help="check-query-counts fails if a list endpoint's query count grows with its "
+             "result size; load-test fires concurrent bookings at a scratch event and "
+             "fails on overselling; benchmark-search times searches over a scratch "
+             "database of synthetic bookings; benchmark-checkin scans confirmation codes "
+             "concurrently at a scratch event; benchmark-holds expires lapsed seat holds "
+             "while bookings arrive; benchmark-dashboard times the dashboard page and its fragments"
+    )
+    parser.add_argument("--bookings", type=int, default=2000, help="load-test: concurrent booking requests")
+    parser.add_argument("--capacity", type=int, default=2500, help="load-test: seats at the event")
+    parser.add_argument("--min-rate", type=float, default=120, help="load-test: bookings/sec to require (2000 bookings measured 159-251/sec)")
+    parser.add_argument("--search-bookings", type=int, default=1000000, help="benchmark-search: bookings to search over")
+    parser.add_argument("--max-ms", type=float, default=10, help="benchmark-search: median milliseconds to allow per search")
+    parser.add_argument("--checkins", type=int, default=5000, help="benchmark-checkin: concurrent scans")
+    parser.add_argument("--min-scan-rate", type=float, default=100, help="benchmark-checkin: scans/sec to require (100 is 6000 a minute)")
+    parser.add_argument("--holds", type=int, default=200000, help="benchmark-holds: pending holds, half of them lapsed")
+    parser.add_argument("--dashboard-bookings", type=int, default=100000, help="benchmark-dashboard: bookings in the database")
+    parser.add_argument("--max-page-ms", type=float, default=50, help="benchmark-dashboard: median milliseconds to allow per request")
+    args = parser.parse_args()
+    
+    if args.command == "check-query-counts":
+        problems = asyncio.run(query_count_problems())
+        for problem in problems:
+            print(f"N+1 queries - {problem}")
+        if problems:
+            sys.exit(1)
+        print("All list endpoints run a constant number of queries")
+    elif args.command == "load-test":
+        result = asyncio.run(load_test(args.bookings, args.capacity))
+        print(
+            f"{args.bookings} requests: {result['booked']} booked, {result['sold_out']} sold out, "
+            f"{result['failed']} failed; {result['seats_booked']}/{args.capacity} seats booked, "
+            f"{result['seats_reserved']} reserved; {result['bookings_per_second']:.0f} bookings/sec"
+        )
+        problems = []
+        if result["seats_booked"] > args.capacity:
+            problems.append("event oversold")
+        if result["inventory_errors"]:
+            problems.append("inventory out of step with bookings")
+        if result["failed"]:
+            problems.append("some bookings failed")
+        if result["bookings_per_second"] < args.min_rate:
+            problems.append(f"below {args.min_rate:.0f} bookings/sec")
+        if problems:
+            print("Load test failed - " + "; ".join(problems))
+            sys.exit(1)
+    elif args.command == "benchmark-search":
+        timings = asyncio.run(benchmark_search(args.search_bookings))
+        too_slow = []
+        for name, milliseconds in timings.items():
+            print(f"{name}: {milliseconds:.1f} ms")
+            if milliseconds > args.max_ms:
+                too_slow.append(name)
+        if too_slow:
+            print(f"Searches slower than {args.max_ms:.0f} ms: " + ", ".join(too_slow))
+            sys.exit(1)
+    elif args.command == "benchmark-checkin":
+        result = asyncio.run(benchmark_checkin(args.checkins))
+        print(
+            f"{args.checkins} scans: {result['admitted']} admitted, {result['failed']} failed, "
+            f"{result['scans_per_second']:.0f} scans/sec; rescanning them admitted "
+            f"{result['admitted_twice']} and rejected {result['rejected_rescans']}"
+        )
+        problems = []
+        if result["admitted"] != args.checkins or result["failed"]:
+            problems.append("some scans failed")
+        if result["admitted_twice"]:
+            problems.append("some bookings were admitted twice")
+        if result["scans_per_second"] < args.min_scan_rate:
+            problems.append(f"below {args.min_scan_rate:.0f} scans/sec")
+        if problems:
+            print("Check-in benchmark failed - " + "; ".join(problems))
+            sys.exit(1)
+    elif args.command == "benchmark-holds":
+        result = asyncio.run(benchmark_holds(args.holds))
+        print(
+            f"{args.holds} holds: {result['expired']}/{result['lapsed']} lapsed holds expired at "
+            f"{result['holds_per_second']:.0f}/sec, median batch {result['median_batch_ms']:.0f} ms, "
+            f"idle pass {result['idle_pass_ms']:.1f} ms; {result['booked']} concurrent bookings, "
+            f"{result['failed']} failed"
+        )
+        problems = []
+        if result["expired"] != result["lapsed"]:
+            problems.append("expired holds that had not lapsed, or missed some that had")
+        if result["inventory_errors"]:
+            problems.append("inventory out of step with bookings")
+        if result["failed"]:
+            problems.append("some bookings failed")
+        if problems:
+            print("Hold benchmark failed - " + "; ".join(problems))
+            sys.exit(1)
+    elif args.command == "benchmark-dashboard":
+        results = asyncio.run(benchmark_dashboard(args.dashboard_bookings))
+        too_slow = []
+        for name, (milliseconds, statements) in results.items():
+            _, limited = DASHBOARD_BENCHMARK_PAGES[name]
+            print(f"{name}: {milliseconds:.1f} ms, {statements} queries" + ("" if limited else " (not held to the limit)"))
+            if limited and milliseconds > args.max_page_ms:
+                too_slow.append(name)
+        if too_slow:
+            print(f"Dashboard requests slower than {args.max_page_ms:.0f} ms: " + ", ".join(too_slow))
+            sys.exit(1)
@@ -1,19 +1,64 @@
-from fastapi import FastAPI, HTTPException, Request, Form, Depends, Query
+from fastapi import FastAPI, HTTPException, Request, Form, Depends, Query, Body
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Enum, func
-from sqlalchemy.orm import sessionmaker, Session, declarative_base, relationship
+from sqlalchemy import create_engine, event, select, update, insert, case, cast, text, table, column, Column, Integer, String, Float, DateTime, ForeignKey, Enum, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session, declarative_base, relationship, joinedload, contains_eager
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Dict
-from datetime import datetime, date
+from typing import Awaitable, Callable, List, Optional, Dict, Tuple, TypeVar
+from datetime import datetime, date, timedelta
+from contextlib import asynccontextmanager, suppress
+import argparse
+import asyncio
 import enum
+import hashlib
+import logging
 import os
+import random
+import re
+import secrets
+import string
+import sys
+import time
+
+logger = logging.getLogger(__name__)
 
 # Database setup
-DATABASE_URL = "sqlite:///./booking.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = "sqlite+aiosqlite:///./booking.db"
+SYNC_DATABASE_URL = "sqlite:///./booking.db"
+
+def create_booking_engine(url: str):
+    """Async engine with a pool of warm connections (aiosqlite otherwise opens
+    one connection and thread per session)"""
+    return create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=10,
+        max_overflow=10,
+        pool_timeout=30
+    )
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a write is in progress; busy_timeout makes
+    # writers queue for the lock instead of failing with "database is locked"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+engine = create_booking_engine(DATABASE_URL)
+event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Synchronous engine, only used by the command-line tools
+sync_engine = create_engine(SYNC_DATABASE_URL, connect_args={"check_same_thread": False})
+
 Base = declarative_base()
 
 # Enums
@@ -67,20 +112,44 @@ class BookingDB(Base):
     __tablename__ = "bookings"
     
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"))
-    ticket_type_id = Column(Integer, ForeignKey("ticket_types.id"))
+    # Indexed for the event and ticket type search filters and listings
+    event_id = Column(Integer, ForeignKey("events.id"), index=True)
+    ticket_type_id = Column(Integer, ForeignKey("ticket_types.id"), index=True)
     customer_name = Column(String, nullable=False)
     customer_email = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False, default=1)
     total_amount = Column(Float, nullable=False)
     status = Column(Enum(BookingStatus), default=BookingStatus.PENDING)
     booking_date = Column(DateTime, default=datetime.utcnow)
-    confirmation_code = Column(String, nullable=False)
+    confirmation_code = Column(String, nullable=False, unique=True, index=True)
+    checked_in_at = Column(DateTime, nullable=True)
+    # When a pending booking's hold on its seats lapses; null once it is
+    # confirmed or cancelled, so the index only ever leads to live holds
+    expires_at = Column(DateTime, nullable=True, index=True)
     
     # Relationships
     event = relationship("EventDB", back_populates="bookings")
     ticket_type = relationship("TicketTypeDB", back_populates="bookings")
 
+class EventInventoryDB(Base):
+    """Seats held against each event's capacity, kept in step with its bookings
+    so that taking seats is a single conditional UPDATE"""
+    __tablename__ = "event_inventory"
+    
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    capacity = Column(Integer, nullable=False)
+    reserved = Column(Integer, nullable=False, default=0)
+
+class TicketInventoryDB(Base):
+    """Seats each event's bookings hold per ticket type, and how many of those
+    are confirmed, kept in step with the bookings like event_inventory"""
+    __tablename__ = "ticket_inventory"
+    
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=True)
+    ticket_type_id = Column(Integer, ForeignKey("ticket_types.id"), primary_key=True)
+    reserved = Column(Integer, nullable=False, default=0)
+    confirmed = Column(Integer, nullable=False, default=0)
+
 # Pydantic Models
 class VenueBase(BaseModel):
     name: str = Field(..., min_length=1)
@@ -139,7 +208,7 @@ class BookingCreate(BookingBase):
 class BookingUpdate(BaseModel):
     customer_name: Optional[str] = None
     customer_email: Optional[str] = None
-    quantity: Optional[int] = None
+    quantity: Optional[int] = Field(None, gt=0)
 
 class BookingStatusUpdate(BaseModel):
     status: BookingStatus
@@ -150,12 +219,31 @@ class Booking(BookingBase):
     status: BookingStatus
     booking_date: datetime
     confirmation_code: str
+    checked_in_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
     event: Optional[Event] = None
     ticket_type: Optional[TicketType] = None
     
     class Config:
         from_attributes = True
 
+class CheckIn(BaseModel):
+    booking_id: int
+    event_id: int
+    customer_name: str
+    quantity: int
+    checked_in_at: datetime
+
+class BatchBookingResult(BaseModel):
+    index: int
+    booking: Optional[Booking] = None
+    error: Optional[str] = None
+
+class BatchBookingResponse(BaseModel):
+    booked: int
+    failed: int
+    results: List[BatchBookingResult]
+
 class BookingStats(BaseModel):
     total_bookings: int
     total_events: int
@@ -179,40 +267,211 @@ class VenueOccupancy(BaseModel):
     total_bookings: int
     occupancy_rate: float
 
+class TicketTypeSeats(BaseModel):
+    ticket_type_id: int
+    ticket_type: TicketTypeEnum
+    booked: int
+    confirmed: int
+
 class AvailableTickets(BaseModel):
     event_id: int
     event_name: str
     venue_capacity: int
     total_booked: int
     available_tickets: int
+    ticket_types: List[TicketTypeSeats] = []
+
+# Eager-loading options matching what the response models serialize. Every
+# relationship here is many-to-one, so a LEFT JOIN fetches it with the parent
+# rows instead of one lazy load per row
+EVENT_DETAILS = (joinedload(EventDB.venue),)
+BOOKING_DETAILS = (
+    joinedload(BookingDB.event).joinedload(EventDB.venue),
+    joinedload(BookingDB.ticket_type),
+)
+
+def event_revenue_query():
+    """Revenue and booking counts per event, in one grouped pass over bookings.
+
+    Events without bookings are included with zeros.
+    """
+    confirmed = BookingDB.status == BookingStatus.CONFIRMED
+    return (
+        select(
+            EventDB.id,
+            EventDB.name,
+            func.coalesce(func.sum(case((confirmed, BookingDB.total_amount), else_=0)), 0),
+            func.count(BookingDB.id),
+            func.coalesce(func.sum(case((confirmed, 1), else_=0)), 0)
+        )
+        .outerjoin(BookingDB, BookingDB.event_id == EventDB.id)
+        .group_by(EventDB.id)
+        .order_by(EventDB.id)
+    )
+
+def event_revenue(row) -> EventRevenue:
+    event_id, event_name, total_revenue, total_bookings, confirmed_bookings = row
+    return EventRevenue(
+        event_id=event_id,
+        event_name=event_name,
+        total_revenue=total_revenue,
+        total_bookings=total_bookings,
+        confirmed_bookings=confirmed_bookings
+    )
+
+# Seat reservation
+# Bookings in these statuses hold their seats; cancelling one gives them back
+HOLDING_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+HOLD_TTL = timedelta(minutes=15)  # how long a pending booking holds its seats
+
+def hold_expiry(status: BookingStatus) -> Optional[datetime]:
+    """expires_at for a booking entering `status`: pending bookings hold
+    their seats for HOLD_TTL, others until they change status"""
+    return datetime.utcnow() + HOLD_TTL if status == BookingStatus.PENDING else None
+
+def seats_held(status: BookingStatus, quantity: int) -> Tuple[int, int]:
+    """Seats a booking with this status and quantity holds, and how many of
+    those are confirmed"""
+    return (
+        quantity if status in HOLDING_STATUSES else 0,
+        quantity if status == BookingStatus.CONFIRMED else 0
+    )
+
+async def adjust_seats(db: AsyncSession, event_id: int, ticket_type_id: int, reserved: int, confirmed: int = 0) -> bool:
+    """Add `reserved` held and `confirmed` confirmed seats (either may be
+    negative) to the event's and ticket type's inventory, in the caller's
+    transaction.
+
+    Taking seats checks capacity and increments in one UPDATE, so concurrent
+    reservations can never take more seats than remain. Returns False (and
+    changes nothing) when too few are left or the event does not exist.
+    """
+    if reserved:
+        statement = (
+            update(EventInventoryDB)
+            .where(EventInventoryDB.event_id == event_id)
+            .values(reserved=EventInventoryDB.reserved + reserved)
+            .execution_options(synchronize_session=False)
+        )
+        if reserved > 0:
+            statement = statement.where(EventInventoryDB.capacity - EventInventoryDB.reserved >= reserved)
+        if (await db.execute(statement)).rowcount != 1:
+            return False
+    
+    if reserved or confirmed:
+        await db.execute(ticket_inventory_upsert(), {
+            "event_id": event_id, "ticket_type_id": ticket_type_id, "reserved": reserved, "confirmed": confirmed
+        })
+    return True
+
+def ticket_inventory_upsert():
+    """Statement adding :reserved and :confirmed seats to the row for
+    :event_id and :ticket_type_id, which appears with the event's first
+    booking of that ticket type"""
+    upsert = sqlite_insert(TicketInventoryDB)
+    return upsert.on_conflict_do_update(
+        index_elements=[TicketInventoryDB.event_id, TicketInventoryDB.ticket_type_id],
+        set_={
+            "reserved": TicketInventoryDB.reserved + upsert.excluded.reserved,
+            "confirmed": TicketInventoryDB.confirmed + upsert.excluded.confirmed
+        }
+    )
+
+async def move_seats(db: AsyncSession, booking: BookingDB, status: BookingStatus, quantity: int) -> bool:
+    """Update the inventory for `booking` changing to `status` and `quantity`
+    (0 when it is deleted); False if that needs more seats than remain"""
+    reserved_before, confirmed_before = seats_held(booking.status, booking.quantity)
+    reserved_after, confirmed_after = seats_held(status, quantity)
+    return await adjust_seats(
+        db,
+        booking.event_id,
+        booking.ticket_type_id,
+        reserved_after - reserved_before,
+        confirmed_after - confirmed_before
+    )
+
+async def lock_booking(db: AsyncSession, booking_id: int) -> Optional[BookingDB]:
+    """The booking, read after taking SQLite's write lock so that neither a
+    concurrent request nor the hold reaper can change it before the caller
+    commits; seats are moved from the status read here"""
+    await db.execute(
+        update(BookingDB)
+        .where(BookingDB.id == booking_id)
+        .values(status=BookingDB.status)
+        .execution_options(synchronize_session=False)
+    )
+    return await db.get(BookingDB, booking_id)
+
+async def load_booking(db: AsyncSession, booking_id: int) -> BookingDB:
+    """A booking with the relationships its response model serializes"""
+    return (await db.scalars(
+        select(BookingDB).options(*BOOKING_DETAILS).where(BookingDB.id == booking_id)
+    )).one()
+
+# Write retries
+# busy_timeout makes a writer wait for the lock, but SQLite still reports
+# "database is locked" when a long queue of writers outlasts the wait, and at
+# once when a transaction that has already read tries to write after another
+# connection committed. Either way the transaction wrote nothing and can run again
+LOCKED_RETRIES = 8  # further attempts at a transaction that found the database locked
+LOCKED_RETRY_DELAY = 0.05  # seconds before the first retry, doubling after each
+
+T = TypeVar("T")
+
+def database_locked(error: OperationalError) -> bool:
+    return "database is locked" in str(error.orig)
+
+async def retry_when_locked(db: AsyncSession, transaction: Callable[[], Awaitable[T]]) -> T:
+    """Await `transaction`, which writes through `db` and commits, rolling
+    back and running it again after a growing, jittered pause whenever the
+    database is locked, up to LOCKED_RETRIES times"""
+    for attempt in range(LOCKED_RETRIES):
+        try:
+            return await transaction()
+        except OperationalError as e:
+            if not database_locked(e):
+                raise
+            await db.rollback()
+            await asyncio.sleep(LOCKED_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+    return await transaction()
 
 # Database dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 # FastAPI app
-app = FastAPI(title="Ticket Booking System", description="Manage events, venues, and ticket bookings with relationships")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker before it serves; after the first start this is a
+    # single PRAGMA read. Run `python main.py init-db` before starting several
+    # workers against a new database so they don't race to create it
+    async with engine.begin() as connection:
+        await connection.run_sync(prepare_database)
+    reaper = asyncio.create_task(reap_holds())
+    try:
+        yield
+    finally:
+        # Let the reaper unwind before the pool closes under it
+        reaper.cancel()
+        with suppress(asyncio.CancelledError):
+            await reaper
+        await engine.dispose()
+
+app = FastAPI(
+    title="Ticket Booking System",
+    description="Manage events, venues, and ticket bookings with relationships",
+    lifespan=lifespan
+)
 
 # Set up templates and static files
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize sample data
-def init_sample_data():
-    db = SessionLocal()
-    try:
-        # Check if data already exists
-        existing_venues = db.query(VenueDB).first()
-        if existing_venues:
-            return
-        
+# Sample data
+def seed_sample_data(connection: Connection):
+    """Add sample venues, ticket types, events and bookings, in the caller's transaction"""
+    with Session(bind=connection, autoflush=False) as db:
         # Add sample venues
         venues = [
             VenueDB(name="Madison Square Garden", location="New York, NY", capacity=20000),
@@ -220,7 +479,7 @@ def init_sample_data():
             VenueDB(name="Red Rocks Amphitheatre", location="Morrison, CO", capacity=9525),
         ]
         db.add_all(venues)
-        db.commit()
+        db.flush()
         
         # Add sample ticket types
         ticket_types = [
@@ -229,7 +488,7 @@ def init_sample_data():
             TicketTypeDB(name=TicketTypeEnum.ECONOMY, price=49.99, description="Economy seating, budget-friendly option"),
         ]
         db.add_all(ticket_types)
-        db.commit()
+        db.flush()
         
         # Add sample events
         events = [
@@ -241,12 +500,9 @@ def init_sample_data():
                    date=datetime(2024, 8, 10, 18, 0), venue_id=3),
         ]
         db.add_all(events)
-        db.commit()
+        db.flush()
         
         # Add sample bookings
-        import random
-        import string
-        
         for i in range(10):
             confirmation_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
             event_id = random.randint(1, 3)
@@ -256,6 +512,7 @@ def init_sample_data():
             # Get ticket price
             ticket_type = db.query(TicketTypeDB).filter(TicketTypeDB.id == ticket_type_id).first()
             total_amount = ticket_type.price * quantity
+            status = random.choice(list(BookingStatus))
             
             booking = BookingDB(
                 event_id=event_id,
@@ -264,27 +521,319 @@ def init_sample_data():
                 customer_email=f"customer{i+1}@example.com",
                 quantity=quantity,
                 total_amount=total_amount,
-                status=random.choice(list(BookingStatus)),
-                confirmation_code=confirmation_code
+                status=status,
+                confirmation_code=confirmation_code,
+                expires_at=hold_expiry(status)
             )
             db.add(booking)
         
-        db.commit()
+        db.flush()
         print("Sample data initialized!")
-    except Exception as e:
-        print(f"Error initializing sample data: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
-# Initialize sample data on startup
-init_sample_data()
+# Inventory maintenance
+def expected_inventory():
+    """Queries for what event_inventory and ticket_inventory should hold,
+    computed from the bookings"""
+    held = (
+        select(func.coalesce(func.sum(BookingDB.quantity), 0))
+        .where(BookingDB.event_id == EventDB.id, BookingDB.status.in_(HOLDING_STATUSES))
+        .scalar_subquery()
+    )
+    events = (
+        select(EventDB.id, VenueDB.capacity, held)
+        .join(VenueDB, VenueDB.id == EventDB.venue_id)
+    )
+    ticket_types = (
+        select(
+            BookingDB.event_id,
+            BookingDB.ticket_type_id,
+            func.sum(case((BookingDB.status.in_(HOLDING_STATUSES), BookingDB.quantity), else_=0)),
+            func.sum(case((BookingDB.status == BookingStatus.CONFIRMED, BookingDB.quantity), else_=0))
+        )
+        .group_by(BookingDB.event_id, BookingDB.ticket_type_id)
+    )
+    return events, ticket_types
+
+def rebuild_inventory(connection):
+    """Recompute both inventory tables from the bookings"""
+    events, ticket_types = expected_inventory()
+    connection.execute(EventInventoryDB.__table__.delete())
+    connection.execute(
+        insert(EventInventoryDB).from_select(["event_id", "capacity", "reserved"], events)
+    )
+    connection.execute(TicketInventoryDB.__table__.delete())
+    connection.execute(
+        insert(TicketInventoryDB).from_select(["event_id", "ticket_type_id", "reserved", "confirmed"], ticket_types)
+    )
+
+def inventory_drift(connection) -> List[str]:
+    """Describe every inventory row that disagrees with the bookings"""
+    events, ticket_types = expected_inventory()
+    problems = []
+    
+    expected = {event_id: (capacity, reserved) for event_id, capacity, reserved in connection.execute(events)}
+    actual = {
+        event_id: (capacity, reserved)
+        for event_id, capacity, reserved in connection.execute(
+            select(EventInventoryDB.event_id, EventInventoryDB.capacity, EventInventoryDB.reserved)
+        )
+    }
+    for event_id in sorted(expected.keys() | actual.keys()):
+        if expected.get(event_id) != actual.get(event_id):
+            problems.append(
+                f"event {event_id}: (capacity, reserved) is {actual.get(event_id)}, bookings give {expected.get(event_id)}"
+            )
+    
+    expected = {(event_id, type_id): (reserved, confirmed) for event_id, type_id, reserved, confirmed in connection.execute(ticket_types)}
+    actual = {
+        (event_id, type_id): (reserved, confirmed)
+        for event_id, type_id, reserved, confirmed in connection.execute(
+            select(
+                TicketInventoryDB.event_id,
+                TicketInventoryDB.ticket_type_id,
+                TicketInventoryDB.reserved,
+                TicketInventoryDB.confirmed
+            )
+        )
+    }
+    for key in sorted(expected.keys() | actual.keys()):
+        # A ticket type whose bookings were all deleted keeps a row of zeros
+        if expected.get(key, (0, 0)) != actual.get(key, (0, 0)):
+            problems.append(
+                f"event {key[0]}, ticket type {key[1]}: (reserved, confirmed) is {actual.get(key)}, "
+                f"bookings give {expected.get(key)}"
+            )
+    return problems
+
+# Build the inventory when it has never been built: a new database, or one
+# from before the inventory tables existed
+def migrate_inventory(connection: Connection):
+    events_missing = connection.scalar(
+        select(EventDB.id).where(~EventDB.id.in_(select(EventInventoryDB.event_id))).limit(1)
+    )
+    ticket_types_missing = (
+        connection.scalar(select(TicketInventoryDB.event_id).limit(1)) is None
+        and connection.scalar(select(BookingDB.id).limit(1)) is not None
+    )
+    if events_missing is not None or ticket_types_missing:
+        rebuild_inventory(connection)
+
+# Booking search
+# A standalone FTS5 table, since a booking's searchable text comes from four
+# tables; rowid is the booking id. The triggers below re-index a booking when
+# it, or the event, venue or ticket type it points at, changes
+bookings_fts = table("bookings_fts", column("rowid"), column("rank"), column("bookings_fts"))
+
+SEARCH_COLUMNS = "rowid, event_name, venue_name, customer_name, customer_email, ticket_type"
+SEARCH_ROWS = """
+    SELECT b.id, e.name, v.name, b.customer_name, b.customer_email, t.name
+    FROM bookings b
+    LEFT JOIN events e ON e.id = b.event_id
+    LEFT JOIN venues v ON v.id = e.venue_id
+    LEFT JOIN ticket_types t ON t.id = b.ticket_type_id"""
+
+def reindex_bookings(where: str) -> str:
+    """Trigger body re-indexing the bookings `b` that satisfy `where`"""
+    return f"""
+        DELETE FROM bookings_fts WHERE rowid IN (SELECT b.id FROM bookings b WHERE {where});
+        INSERT INTO bookings_fts({SEARCH_COLUMNS}) {SEARCH_ROWS} WHERE {where};"""
+
+SEARCH_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5(
+        event_name, venue_name, customer_name, customer_email, ticket_type,
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings BEGIN
+        INSERT INTO bookings_fts({SEARCH_COLUMNS}) {SEARCH_ROWS} WHERE b.id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings BEGIN
+        DELETE FROM bookings_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS bookings_fts_update
+    AFTER UPDATE OF event_id, ticket_type_id, customer_name, customer_email ON bookings BEGIN
+        {reindex_bookings("b.id = new.id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF name, venue_id ON events BEGIN
+        {reindex_bookings("b.event_id = new.id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS venues_fts_update AFTER UPDATE OF name ON venues BEGIN
+        {reindex_bookings("b.event_id IN (SELECT id FROM events WHERE venue_id = new.id)")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ticket_types_fts_update AFTER UPDATE OF name ON ticket_types BEGIN
+        {reindex_bookings("b.ticket_type_id = new.id")}
+    END""",
+]
+
+def rebuild_search_index(connection: Connection):
+    """Re-index every booking, e.g. after bookings were written with the triggers missing"""
+    connection.execute(text("DELETE FROM bookings_fts"))
+    connection.execute(text(f"INSERT INTO bookings_fts({SEARCH_COLUMNS}) {SEARCH_ROWS}"))
+
+def migrate_search(connection: Connection):
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookings_fts'")
+    ).first()
+    for statement in SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    # Index the bookings that were written before the search table existed
+    if not exists:
+        rebuild_search_index(connection)
+
+# Confirmation codes
+CONFIRMATION_CODE_ALPHABET = string.ascii_uppercase + string.digits
+CONFIRMATION_CODE_LENGTH = 8
 
-# Helper function to generate confirmation code
 def generate_confirmation_code():
-    import random
-    import string
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+    """A random code that cannot be guessed from other bookings' codes; see
+    new_confirmation_codes for making sure it is not taken"""
+    return ''.join(secrets.choice(CONFIRMATION_CODE_ALPHABET) for _ in range(CONFIRMATION_CODE_LENGTH))
+
+async def new_confirmation_codes(db: AsyncSession, count: int) -> List[str]:
+    """`count` distinct codes that no booking has yet, for inserting many
+    bookings at once, checked with one indexed lookup per round. Call it once
+    the transaction has written, so that it holds SQLite's write lock and no
+    other booking can take a code before this one commits."""
+    codes = set()
+    while len(codes) < count:
+        candidates = {generate_confirmation_code() for _ in range(count - len(codes))} - codes
+        taken = set((await db.scalars(
+            select(BookingDB.confirmation_code).where(BookingDB.confirmation_code.in_(candidates))
+        )).all())
+        codes |= candidates - taken
+    return list(codes)
+
+def migrate_checkin(connection: Connection):
+    """Bring a bookings table from before check-in up to date: add the
+    checked_in_at column, give every booking sharing a code a fresh one, and
+    index the codes as unique"""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(bookings)")}
+    if "checked_in_at" not in columns:
+        connection.exec_driver_sql("ALTER TABLE bookings ADD COLUMN checked_in_at DATETIME")
+    
+    index = next(index for index in BookingDB.__table__.indexes if index.columns.keys() == ["confirmation_code"])
+    if connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": index.name}
+    ).first():
+        return
+    taken = set(connection.scalars(select(BookingDB.confirmation_code)))
+    duplicates = connection.scalars(
+        select(BookingDB.id).where(
+            BookingDB.id.not_in(select(func.min(BookingDB.id)).group_by(BookingDB.confirmation_code))
+        )
+    ).all()
+    for booking_id in duplicates:
+        code = generate_confirmation_code()
+        while code in taken:
+            code = generate_confirmation_code()
+        taken.add(code)
+        connection.execute(update(BookingDB).where(BookingDB.id == booking_id).values(confirmation_code=code))
+    index.create(connection)
+
+# Seat holds
+HOLD_EXPIRY_BATCH = 250  # holds expired per transaction, about 10 ms of write lock
+HOLD_EXPIRY_PAUSE = 0.02  # seconds between batches, so bookings can take the write lock
+HOLD_REAP_INTERVAL = 1.0  # seconds between looking for lapsed holds
+
+def migrate_holds(connection: Connection):
+    """Add expires_at to a bookings table from before seat holds, starting
+    a full hold for every booking already pending"""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(bookings)")}
+    if "expires_at" in columns:
+        return
+    connection.exec_driver_sql("ALTER TABLE bookings ADD COLUMN expires_at DATETIME")
+    index = next(index for index in BookingDB.__table__.indexes if index.columns.keys() == ["expires_at"])
+    index.create(connection)
+    connection.execute(
+        update(BookingDB)
+        .where(BookingDB.status == BookingStatus.PENDING)
+        .values(expires_at=hold_expiry(BookingStatus.PENDING))
+    )
+
+# Schema setup
+# Bump whenever the tables, indexes or triggers change: databases recording an
+# older version in PRAGMA user_version are migrated on their next start, and
+# databases already at this version skip setup entirely
+SCHEMA_VERSION = 2
+
+def migrate_indexes(connection: Connection):
+    """create_all skips tables that already exist, so add the bookings
+    indexes introduced since an existing booking.db was created"""
+    for index in BookingDB.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+def prepare_database(connection: Connection) -> bool:
+    """Create or migrate the schema, seed sample data into an empty database
+    and build the inventory and search index where they are missing.
+
+    Returns False without touching anything when the database is already at
+    SCHEMA_VERSION, which costs a single PRAGMA read.
+    """
+    version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    if version == SCHEMA_VERSION:
+        return False
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"booking.db has schema version {version}, newer than this app's {SCHEMA_VERSION}")
+    
+    Base.metadata.create_all(bind=connection)
+    # Columns added since older databases were created, before anything
+    # writes bookings through the current model
+    migrate_checkin(connection)
+    migrate_holds(connection)
+    migrate_indexes(connection)
+    if connection.execute(select(VenueDB.id).limit(1)).first() is None:
+        seed_sample_data(connection)
+    migrate_inventory(connection)
+    migrate_search(connection)
+    
+    connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return True
+
+async def expire_holds(db: AsyncSession, limit: int = HOLD_EXPIRY_BATCH) -> int:
+    """Cancel up to `limit` pending bookings whose hold has lapsed, oldest
+    first, and give their seats back, in one transaction. Returns how many
+    were cancelled.
+
+    The bookings are found through the index on expires_at, so a pass costs
+    the same however many live holds there are. Cancelling them is the
+    transaction's first write, and the RETURNING rows say how many seats to
+    release per event and ticket type.
+    """
+    expired = (await db.execute(
+        update(BookingDB)
+        .where(BookingDB.id.in_(
+            select(BookingDB.id)
+            .where(BookingDB.expires_at <= datetime.utcnow(), BookingDB.status == BookingStatus.PENDING)
+            .order_by(BookingDB.expires_at)
+            .limit(limit)
+        ))
+        .values(status=BookingStatus.CANCELLED, expires_at=None)
+        .returning(BookingDB.event_id, BookingDB.ticket_type_id, BookingDB.quantity)
+        .execution_options(synchronize_session=False)
+    )).all()
+    released = {}
+    for event_id, ticket_type_id, quantity in expired:
+        released[event_id, ticket_type_id] = released.get((event_id, ticket_type_id), 0) + quantity
+    for (event_id, ticket_type_id), seats in released.items():
+        await adjust_seats(db, event_id, ticket_type_id, -seats)
+    await db.commit()
+    return len(expired)
+
+async def reap_holds(session_factory=AsyncSessionLocal):
+    """Expire lapsed holds every HOLD_REAP_INTERVAL seconds, in batches of
+    HOLD_EXPIRY_BATCH until none are left"""
+    while True:
+        try:
+            async with session_factory() as db:
+                while await expire_holds(db) == HOLD_EXPIRY_BATCH:
+                    await asyncio.sleep(HOLD_EXPIRY_PAUSE)
+        except OperationalError as e:
+            # The write lock stayed busy; the holds are still there next time
+            logger.warning("Expiring holds failed: %s", e)
+        except Exception:
+            # Leaving the session rolled back whatever the pass had written;
+            # keep reaping, or no hold would ever lapse again until a restart
+            logger.exception("Expiring holds failed unexpectedly")
+        await asyncio.sleep(HOLD_REAP_INTERVAL)
 
 # API Endpoints
 
@@ -295,88 +844,84 @@ async def create_event(
     description: str = Form(...),
     date: datetime = Form(...),
     venue_id: int = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new event"""
     # Check if venue exists
-    venue = db.query(VenueDB).filter(VenueDB.id == venue_id).first()
+    venue = await db.get(VenueDB, venue_id)
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
     
     event_data = EventCreate(name=name, description=description, date=date, venue_id=venue_id)
-    db_event = EventDB(**event_data.dict())
+    db_event = EventDB(**event_data.dict(), venue=venue)
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    await db.flush()
+    db.add(EventInventoryDB(event_id=db_event.id, capacity=venue.capacity, reserved=0))
+    await db.commit()
     return db_event
 
 @app.get("/events", response_model=List[Event])
-async def get_events(db: Session = Depends(get_db)):
+async def get_events(db: AsyncSession = Depends(get_db)):
     """Get all events"""
-    events = db.query(EventDB).all()
+    events = (await db.scalars(select(EventDB).options(*EVENT_DETAILS))).all()
     return events
 
 @app.get("/events/{event_id}/bookings", response_model=List[Booking])
-async def get_event_bookings(event_id: int, db: Session = Depends(get_db)):
+async def get_event_bookings(event_id: int, db: AsyncSession = Depends(get_db)):
     """Get all bookings for a specific event"""
-    event = db.query(EventDB).filter(EventDB.id == event_id).first()
+    event = await db.get(EventDB, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    bookings = db.query(BookingDB).filter(BookingDB.event_id == event_id).all()
+    bookings = (await db.scalars(
+        select(BookingDB).options(*BOOKING_DETAILS).where(BookingDB.event_id == event_id)
+    )).all()
     return bookings
 
 @app.get("/events/{event_id}/available-tickets", response_model=AvailableTickets)
-async def get_available_tickets(event_id: int, db: Session = Depends(get_db)):
-    """Get available tickets for an event"""
-    event = db.query(EventDB).filter(EventDB.id == event_id).first()
-    if not event:
+async def get_available_tickets(event_id: int, db: AsyncSession = Depends(get_db)):
+    """Get available tickets for an event: capacity less the seats held by
+    pending and confirmed bookings, read from the inventory rather than the
+    bookings, with the seats booked per ticket type"""
+    row = (await db.execute(
+        select(EventDB.name, EventInventoryDB.capacity, EventInventoryDB.reserved)
+        .join(EventInventoryDB, EventInventoryDB.event_id == EventDB.id)
+        .where(EventDB.id == event_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    venue = db.query(VenueDB).filter(VenueDB.id == event.venue_id).first()
-    total_booked = db.query(func.sum(BookingDB.quantity)).filter(
-        BookingDB.event_id == event_id,
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
-    
-    available = venue.capacity - total_booked
-    
+    event_name, capacity, reserved = row
+    ticket_types = (await db.execute(
+        select(TicketInventoryDB.ticket_type_id, TicketTypeDB.name, TicketInventoryDB.reserved, TicketInventoryDB.confirmed)
+        .join(TicketTypeDB, TicketTypeDB.id == TicketInventoryDB.ticket_type_id)
+        .where(TicketInventoryDB.event_id == event_id)
+        .order_by(TicketInventoryDB.ticket_type_id)
+    )).all()
     return AvailableTickets(
         event_id=event_id,
-        event_name=event.name,
-        venue_capacity=venue.capacity,
-        total_booked=total_booked,
-        available_tickets=max(0, available)
+        event_name=event_name,
+        venue_capacity=capacity,
+        total_booked=reserved,
+        available_tickets=max(0, capacity - reserved),
+        ticket_types=[
+            TicketTypeSeats(ticket_type_id=type_id, ticket_type=name, booked=booked, confirmed=confirmed)
+            for type_id, name, booked, confirmed in ticket_types
+        ]
     )
 
+@app.get("/events/revenue", response_model=List[EventRevenue])
+async def get_events_revenue(db: AsyncSession = Depends(get_db)):
+    """Revenue and booking counts for every event, in one query"""
+    return [event_revenue(row) for row in await db.execute(event_revenue_query())]
+
 @app.get("/events/{event_id}/revenue", response_model=EventRevenue)
-async def get_event_revenue(event_id: int, db: Session = Depends(get_db)):
+async def get_event_revenue(event_id: int, db: AsyncSession = Depends(get_db)):
     """Calculate total revenue for a specific event"""
-    event = db.query(EventDB).filter(EventDB.id == event_id).first()
-    if not event:
+    row = (await db.execute(event_revenue_query().where(EventDB.id == event_id))).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Event not found")
-    
-    total_revenue = db.query(func.sum(BookingDB.total_amount)).filter(
-        BookingDB.event_id == event_id,
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
-    
-    total_bookings = db.query(func.count(BookingDB.id)).filter(
-        BookingDB.event_id == event_id
-    ).scalar() or 0
-    
-    confirmed_bookings = db.query(func.count(BookingDB.id)).filter(
-        BookingDB.event_id == event_id,
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
-    
-    return EventRevenue(
-        event_id=event_id,
-        event_name=event.name,
-        total_revenue=total_revenue,
-        total_bookings=total_bookings,
-        confirmed_bookings=confirmed_bookings
-    )
+    return event_revenue(row)
 
 # Venues
 @app.post("/venues", response_model=Venue, status_code=201)
@@ -384,43 +929,47 @@ async def create_venue(
     name: str = Form(...),
     location: str = Form(...),
     capacity: int = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new venue"""
     venue_data = VenueCreate(name=name, location=location, capacity=capacity)
     db_venue = VenueDB(**venue_data.dict())
     db.add(db_venue)
-    db.commit()
-    db.refresh(db_venue)
+    await db.commit()
     return db_venue
 
 @app.get("/venues", response_model=List[Venue])
-async def get_venues(db: Session = Depends(get_db)):
+async def get_venues(db: AsyncSession = Depends(get_db)):
     """Get all venues"""
-    venues = db.query(VenueDB).all()
+    venues = (await db.scalars(select(VenueDB))).all()
     return venues
 
 @app.get("/venues/{venue_id}/events", response_model=List[Event])
-async def get_venue_events(venue_id: int, db: Session = Depends(get_db)):
+async def get_venue_events(venue_id: int, db: AsyncSession = Depends(get_db)):
     """Get all events at a specific venue"""
-    venue = db.query(VenueDB).filter(VenueDB.id == venue_id).first()
+    venue = await db.get(VenueDB, venue_id)
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
     
-    events = db.query(EventDB).filter(EventDB.venue_id == venue_id).all()
+    events = (await db.scalars(
+        select(EventDB).options(*EVENT_DETAILS).where(EventDB.venue_id == venue_id)
+    )).all()
     return events
 
 @app.get("/venues/{venue_id}/occupancy", response_model=VenueOccupancy)
-async def get_venue_occupancy(venue_id: int, db: Session = Depends(get_db)):
+async def get_venue_occupancy(venue_id: int, db: AsyncSession = Depends(get_db)):
     """Get venue occupancy statistics"""
-    venue = db.query(VenueDB).filter(VenueDB.id == venue_id).first()
+    venue = await db.get(VenueDB, venue_id)
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
     
-    total_bookings = db.query(func.sum(BookingDB.quantity)).join(EventDB).filter(
-        EventDB.venue_id == venue_id,
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
+    # Confirmed seats come from the inventory's few rows per event at the
+    # venue, not from its bookings
+    total_bookings = await db.scalar(
+        select(func.sum(TicketInventoryDB.confirmed))
+        .join(EventDB, EventDB.id == TicketInventoryDB.event_id)
+        .where(EventDB.venue_id == venue_id)
+    ) or 0
     
     occupancy_rate = (total_bookings / venue.capacity * 100) if venue.capacity > 0 else 0
     
@@ -438,30 +987,31 @@ async def create_ticket_type(
     name: TicketTypeEnum = Form(...),
     price: float = Form(...),
     description: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new ticket type"""
     ticket_type_data = TicketTypeCreate(name=name, price=price, description=description)
     db_ticket_type = TicketTypeDB(**ticket_type_data.dict())
     db.add(db_ticket_type)
-    db.commit()
-    db.refresh(db_ticket_type)
+    await db.commit()
     return db_ticket_type
 
 @app.get("/ticket-types", response_model=List[TicketType])
-async def get_ticket_types(db: Session = Depends(get_db)):
+async def get_ticket_types(db: AsyncSession = Depends(get_db)):
     """Get all ticket types"""
-    ticket_types = db.query(TicketTypeDB).all()
+    ticket_types = (await db.scalars(select(TicketTypeDB))).all()
     return ticket_types
 
 @app.get("/ticket-types/{type_id}/bookings", response_model=List[Booking])
-async def get_ticket_type_bookings(type_id: int, db: Session = Depends(get_db)):
+async def get_ticket_type_bookings(type_id: int, db: AsyncSession = Depends(get_db)):
     """Get all bookings for a specific ticket type"""
-    ticket_type = db.query(TicketTypeDB).filter(TicketTypeDB.id == type_id).first()
+    ticket_type = await db.get(TicketTypeDB, type_id)
     if not ticket_type:
         raise HTTPException(status_code=404, detail="Ticket type not found")
     
-    bookings = db.query(BookingDB).filter(BookingDB.ticket_type_id == type_id).all()
+    bookings = (await db.scalars(
+        select(BookingDB).options(*BOOKING_DETAILS).where(BookingDB.ticket_type_id == type_id)
+    )).all()
     return bookings
 
 # Bookings
@@ -471,30 +1021,16 @@ async def create_booking(
     ticket_type_id: int = Form(...),
     customer_name: str = Form(...),
     customer_email: str = Form(...),
-    quantity: int = Form(...),
-    db: Session = Depends(get_db)
+    quantity: int = Form(..., gt=0),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Create a new booking"""
-    # Validate event exists
-    event = db.query(EventDB).filter(EventDB.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
+    """Create a new booking, holding its seats atomically for HOLD_TTL until
+    it is confirmed"""
     # Validate ticket type exists
-    ticket_type = db.query(TicketTypeDB).filter(TicketTypeDB.id == ticket_type_id).first()
+    ticket_type = await db.get(TicketTypeDB, ticket_type_id)
     if not ticket_type:
         raise HTTPException(status_code=404, detail="Ticket type not found")
     
-    # Check availability
-    venue = db.query(VenueDB).filter(VenueDB.id == event.venue_id).first()
-    current_bookings = db.query(func.sum(BookingDB.quantity)).filter(
-        BookingDB.event_id == event_id,
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
-    
-    if current_bookings + quantity > venue.capacity:
-        raise HTTPException(status_code=400, detail="Not enough tickets available")
-    
     # Calculate total amount
     total_amount = ticket_type.price * quantity
     
@@ -507,31 +1043,154 @@ async def create_booking(
         quantity=quantity
     )
     
-    db_booking = BookingDB(
-        **booking_data.dict(),
-        total_amount=total_amount,
-        confirmation_code=generate_confirmation_code()
+    async def book() -> BookingDB:
+        # Reserving the seats is the transaction's first write, so the
+        # statement that checks capacity also takes SQLite's write lock; a
+        # concurrent booking waits for this one to commit. New bookings are
+        # pending, so none of their seats are confirmed yet
+        if not await adjust_seats(db, event_id, ticket_type_id, quantity):
+            await db.rollback()
+            if not await db.get(EventDB, event_id):
+                raise HTTPException(status_code=404, detail="Event not found")
+            raise HTTPException(status_code=400, detail="Not enough tickets available")
+        
+        # The unique index turns a confirmation code that is already taken
+        # into a skipped insert, so checking the code costs no extra
+        # statement; draw another and try again
+        booking_id = None
+        while booking_id is None:
+            booking_id = await db.scalar(
+                sqlite_insert(BookingDB)
+                .values(
+                    **booking_data.model_dump(),
+                    total_amount=total_amount,
+                    confirmation_code=generate_confirmation_code(),
+                    expires_at=hold_expiry(BookingStatus.PENDING)
+                )
+                .on_conflict_do_nothing(index_elements=[BookingDB.confirmation_code])
+                .returning(BookingDB.id)
+            )
+        # Load the response before committing, so the booking costs one pool checkout
+        booking = await load_booking(db, booking_id)
+        await db.commit()
+        return booking
+    
+    # Bookings keep arriving while the reaper expires holds, and neither may
+    # fail the other
+    return await retry_when_locked(db, book)
+
+MAX_BATCH_SIZE = 1000  # bookings accepted by one /bookings/batch request
+
+@app.post("/bookings/batch", response_model=BatchBookingResponse)
+async def create_bookings_batch(
+    bookings: List[BookingCreate] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many bookings in one transaction, reporting the outcome of each.
+
+    Bookings are taken in order: one whose event or ticket type does not exist,
+    or whose event has no room left after the bookings before it, fails
+    without affecting the rest. The lookups, inventory updates and inserts
+    each run once for the whole batch, however long it is.
+    """
+    event_ids = {booking.event_id for booking in bookings}
+    
+    # Take SQLite's write lock before reading the seats left, so a concurrent
+    # booking cannot take them between the check below and the commit
+    await db.execute(
+        update(EventInventoryDB)
+        .where(EventInventoryDB.event_id.in_(event_ids))
+        .values(reserved=EventInventoryDB.reserved)
+        .execution_options(synchronize_session=False)
     )
+    prices = dict((await db.execute(
+        select(TicketTypeDB.id, TicketTypeDB.price)
+        .where(TicketTypeDB.id.in_({booking.ticket_type_id for booking in bookings}))
+    )).all())
+    reserved = {}
+    remaining = {}
+    for event_id, capacity, already_reserved in await db.execute(
+        select(EventDB.id, EventInventoryDB.capacity, EventInventoryDB.reserved)
+        .join(EventInventoryDB, EventInventoryDB.event_id == EventDB.id)
+        .where(EventDB.id.in_(event_ids))
+    ):
+        reserved[event_id] = already_reserved
+        remaining[event_id] = capacity - already_reserved
+    # Nobody else can insert while the lock is held, so the new bookings can
+    # be numbered here rather than read back one RETURNING row at a time
+    next_id = (await db.scalar(select(func.max(BookingDB.id))) or 0) + 1
     
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    expires_at = hold_expiry(BookingStatus.PENDING)
+    errors = {}
+    rows = {}
+    event_seats = {}
+    ticket_seats = {}
+    for index, booking in enumerate(bookings):
+        if booking.event_id not in remaining:
+            errors[index] = "Event not found"
+        elif booking.ticket_type_id not in prices:
+            errors[index] = "Ticket type not found"
+        elif booking.quantity > remaining[booking.event_id]:
+            errors[index] = "Not enough tickets available"
+        else:
+            remaining[booking.event_id] -= booking.quantity
+            event_seats[booking.event_id] = event_seats.get(booking.event_id, 0) + booking.quantity
+            key = (booking.event_id, booking.ticket_type_id)
+            ticket_seats[key] = ticket_seats.get(key, 0) + booking.quantity
+            rows[index] = {
+                "id": next_id + len(rows),
+                **booking.model_dump(),
+                "total_amount": prices[booking.ticket_type_id] * booking.quantity,
+                "expires_at": expires_at
+            }
+    
+    created = {}
+    if rows:
+        for row, code in zip(rows.values(), await new_confirmation_codes(db, len(rows))):
+            row["confirmation_code"] = code
+        # New bookings are pending: they hold seats, none confirmed yet
+        await db.execute(update(EventInventoryDB), [
+            {"event_id": event_id, "reserved": reserved[event_id] + seats}
+            for event_id, seats in event_seats.items()
+        ])
+        await db.execute(ticket_inventory_upsert(), [
+            {"event_id": event_id, "ticket_type_id": ticket_type_id, "reserved": seats, "confirmed": 0}
+            for (event_id, ticket_type_id), seats in ticket_seats.items()
+        ])
+        await db.execute(insert(BookingDB), list(rows.values()))
+        loaded = {
+            booking.id: booking
+            for booking in (await db.scalars(
+                select(BookingDB).options(*BOOKING_DETAILS).where(BookingDB.id >= next_id)
+            )).all()
+        }
+        created = {index: loaded[row["id"]] for index, row in rows.items()}
+    await db.commit()
+    
+    return BatchBookingResponse(
+        booked=len(created),
+        failed=len(errors),
+        results=[
+            BatchBookingResult(index=index, error=errors[index]) if index in errors
+            else BatchBookingResult(index=index, booking=Booking.model_validate(created[index]))
+            for index in range(len(bookings))
+        ]
+    )
 
 @app.get("/bookings", response_model=List[Booking])
-async def get_bookings(db: Session = Depends(get_db)):
+async def get_bookings(db: AsyncSession = Depends(get_db)):
     """Get all bookings with event, venue, and ticket type details"""
-    bookings = db.query(BookingDB).all()
+    bookings = (await db.scalars(select(BookingDB).options(*BOOKING_DETAILS))).all()
     return bookings
 
 @app.put("/bookings/{booking_id}", response_model=Booking)
 async def update_booking(
     booking_id: int,
     booking_update: BookingUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update booking details"""
-    db_booking = db.query(BookingDB).filter(BookingDB.id == booking_id).first()
+    db_booking = await lock_booking(db, booking_id)
     if not db_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -539,85 +1198,243 @@ async def update_booking(
     
     # If quantity is being updated, recalculate total amount
     if 'quantity' in update_data:
-        ticket_type = db.query(TicketTypeDB).filter(TicketTypeDB.id == db_booking.ticket_type_id).first()
+        ticket_type = await db.get(TicketTypeDB, db_booking.ticket_type_id)
         update_data['total_amount'] = ticket_type.price * update_data['quantity']
+        
+        # Take or give back the difference in seats
+        if not await move_seats(db, db_booking, db_booking.status, update_data['quantity']):
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Not enough tickets available")
     
     for field, value in update_data.items():
         setattr(db_booking, field, value)
     
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    await db.commit()
+    return await load_booking(db, booking_id)
 
 @app.delete("/bookings/{booking_id}")
-async def delete_booking(booking_id: int, db: Session = Depends(get_db)):
+async def delete_booking(booking_id: int, db: AsyncSession = Depends(get_db)):
     """Cancel a booking"""
-    db_booking = db.query(BookingDB).filter(BookingDB.id == booking_id).first()
+    db_booking = await lock_booking(db, booking_id)
     if not db_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    db.delete(db_booking)
-    db.commit()
+    await move_seats(db, db_booking, db_booking.status, 0)
+    await db.delete(db_booking)
+    await db.commit()
     return {"message": "Booking cancelled successfully"}
 
 @app.patch("/bookings/{booking_id}/status", response_model=Booking)
 async def update_booking_status(
     booking_id: int,
     status_update: BookingStatusUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update booking status"""
-    db_booking = db.query(BookingDB).filter(BookingDB.id == booking_id).first()
+    db_booking = await lock_booking(db, booking_id)
     if not db_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
+    # A lapsed hold cannot be confirmed, even if the reaper has not yet
+    # cancelled it
+    if (
+        status_update.status == BookingStatus.CONFIRMED
+        and db_booking.status == BookingStatus.PENDING
+        and db_booking.expires_at is not None
+        and db_booking.expires_at <= datetime.utcnow()
+    ):
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Hold has expired")
+    
+    # Cancelling gives the seats back; reinstating a cancelled booking has to
+    # reserve them again
+    if not await move_seats(db, db_booking, status_update.status, db_booking.quantity):
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Not enough tickets available")
+    
+    if status_update.status != db_booking.status:
+        db_booking.expires_at = hold_expiry(status_update.status)
     db_booking.status = status_update.status
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    await db.commit()
+    return await load_booking(db, booking_id)
+
+# Check-in
+@app.post("/checkin/{code}", response_model=CheckIn)
+async def check_in(
+    code: str,
+    event_id: Optional[int] = Query(None, description="Only admit bookings for this event"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Admit a confirmed booking by its confirmation code, once.
+
+    A successful scan is a single UPDATE found through the unique index on
+    the code; only a rejected one looks the booking up to say why.
+    """
+    checked_in_at = datetime.utcnow()
+    conditions = [
+        BookingDB.confirmation_code == code.upper(),
+        BookingDB.status == BookingStatus.CONFIRMED,
+        BookingDB.checked_in_at.is_(None)
+    ]
+    if event_id is not None:
+        conditions.append(BookingDB.event_id == event_id)
+    
+    async def admit():
+        admitted = (await db.execute(
+            update(BookingDB)
+            .where(*conditions)
+            .values(checked_in_at=checked_in_at)
+            .returning(BookingDB.id, BookingDB.event_id, BookingDB.customer_name, BookingDB.quantity)
+            .execution_options(synchronize_session=False)
+        )).first()
+        await db.commit()
+        return admitted
+    
+    # At the doors every scan is a write, so they queue for the lock
+    admitted = await retry_when_locked(db, admit)
+    if admitted:
+        return CheckIn(
+            booking_id=admitted.id,
+            event_id=admitted.event_id,
+            customer_name=admitted.customer_name,
+            quantity=admitted.quantity,
+            checked_in_at=checked_in_at
+        )
+    
+    booking = (await db.execute(
+        select(BookingDB.event_id, BookingDB.status, BookingDB.checked_in_at)
+        .where(BookingDB.confirmation_code == code.upper())
+    )).first()
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    if event_id is not None and booking.event_id != event_id:
+        raise HTTPException(status_code=409, detail="Booking is for another event")
+    if booking.checked_in_at:
+        raise HTTPException(status_code=409, detail=f"Already checked in at {booking.checked_in_at.isoformat(timespec='seconds')}")
+    raise HTTPException(status_code=409, detail=f"Booking is {booking.status.value}, not confirmed")
 
 # Advanced Queries
+SEARCH_LIMIT = 50  # search results per page
+MAX_SEARCH_LIMIT = 500
+SEARCH_CANDIDATES = 1000  # newest matches ranked per search
+SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+def search_match_expression(q: str) -> str:
+    """Turn the `q` of a booking search into an FTS5 MATCH expression over
+    every column of bookings_fts.
+
+    All terms must match, in any column. "quoted words" match as a phrase
+    and a trailing * matches any word with that prefix. Every term is quoted,
+    so an email address or a column name followed by a colon is searched for
+    as text rather than read as FTS5 syntax; an address becomes the phrase
+    of its parts and matches only that address.
+    """
+    terms = []
+    for phrase, word in SEARCH_TERM.findall(q):
+        prefix = not phrase and word.endswith("*")
+        term = (phrase or word.rstrip("*")).replace('"', '""')
+        if term.strip():
+            terms.append(f'"{term}" *' if prefix else f'"{term}"')
+    return " ".join(terms)
+
 @app.get("/bookings/search", response_model=List[Booking])
 async def search_bookings(
-    event: Optional[str] = Query(None, description="Event name to filter by"),
-    venue: Optional[str] = Query(None, description="Venue name to filter by"),
-    ticket_type: Optional[str] = Query(None, description="Ticket type to filter by"),
-    db: Session = Depends(get_db)
+    q: Optional[str] = Query(None, description='Words to find in any field; use "..." for a phrase and word* for a prefix'),
+    event: Optional[str] = Query(None, description="Text the event name contains"),
+    venue: Optional[str] = Query(None, description="Text the venue name contains"),
+    ticket_type: Optional[str] = Query(None, description="Text the ticket type contains"),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT, description="Maximum number of bookings to return"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Search bookings by event name, venue, and/or ticket type"""
-    query = db.query(BookingDB).join(EventDB).join(VenueDB).join(TicketTypeDB)
-    
+    """Search bookings.
+
+    `event`, `venue` and `ticket_type` match any part of the name,
+    ignoring case, and narrow the bookings to the events and ticket types
+    they name, through the indexes on event_id and ticket_type_id. `q`
+    searches event, venue, customer name and email and ticket type through
+    the full-text index, best matches first; without it the newest bookings
+    come first.
+
+    Only the newest SEARCH_CANDIDATES matches of `q` (or offset + limit, if
+    more) are ranked: bm25 scores every row the ranked query visits, so a
+    word that matches a tenth of all bookings would otherwise cost hundreds
+    of milliseconds. The oldest candidate is found first by walking the
+    matches newest first without scoring them.
+    """
+    conditions = []
     if event:
-        query = query.filter(EventDB.name.ilike(f"%{event}%"))
+        conditions.append(BookingDB.event_id.in_(
+            select(EventDB.id).where(EventDB.name.icontains(event, autoescape=True))
+        ))
     if venue:
-        query = query.filter(VenueDB.name.ilike(f"%{venue}%"))
+        conditions.append(BookingDB.event_id.in_(
+            select(EventDB.id).join(VenueDB, VenueDB.id == EventDB.venue_id)
+            .where(VenueDB.name.icontains(venue, autoescape=True))
+        ))
     if ticket_type:
-        query = query.filter(TicketTypeDB.name.ilike(f"%{ticket_type}%"))
+        conditions.append(BookingDB.ticket_type_id.in_(
+            select(TicketTypeDB.id).where(cast(TicketTypeDB.name, String).icontains(ticket_type, autoescape=True))
+        ))
     
-    bookings = query.all()
-    return bookings
+    if not q:
+        # Page through the ids alone, which stops after the page, and join the
+        # details onto that page; joined first, every match would be sorted
+        page = select(BookingDB.id).where(*conditions).order_by(BookingDB.id.desc()).limit(limit).offset(offset)
+        return (await db.scalars(
+            select(BookingDB).options(*BOOKING_DETAILS).where(BookingDB.id.in_(page)).order_by(BookingDB.id.desc())
+        )).all()
+    
+    expression = search_match_expression(q)
+    if not expression:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    conditions.append(bookings_fts.c.bookings_fts.match(expression))
+    oldest_candidate = await db.scalar(
+        select(BookingDB.id)
+        .join(bookings_fts, bookings_fts.c.rowid == BookingDB.id)
+        .where(*conditions)
+        .order_by(bookings_fts.c.rowid.desc())
+        .offset(max(SEARCH_CANDIDATES, offset + limit) - 1)
+        .limit(1)
+    )
+    if oldest_candidate is not None:
+        conditions.append(bookings_fts.c.rowid >= oldest_candidate)
+    return (await db.scalars(
+        select(BookingDB).options(*BOOKING_DETAILS)
+        .join(bookings_fts, bookings_fts.c.rowid == BookingDB.id)
+        .where(*conditions)
+        .order_by(bookings_fts.c.rank, BookingDB.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )).all()
 
 @app.get("/booking-system/stats", response_model=BookingStats)
-async def get_booking_stats(db: Session = Depends(get_db)):
+async def get_booking_stats(db: AsyncSession = Depends(get_db)):
     """Get booking statistics"""
-    total_bookings = db.query(func.count(BookingDB.id)).scalar() or 0
-    total_events = db.query(func.count(EventDB.id)).scalar() or 0
-    total_venues = db.query(func.count(VenueDB.id)).scalar() or 0
-    total_revenue = db.query(func.sum(BookingDB.total_amount)).filter(
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
-    
-    confirmed_bookings = db.query(func.count(BookingDB.id)).filter(
-        BookingDB.status == BookingStatus.CONFIRMED
-    ).scalar() or 0
-    
-    pending_bookings = db.query(func.count(BookingDB.id)).filter(
-        BookingDB.status == BookingStatus.PENDING
-    ).scalar() or 0
+    # One pass over bookings with a conditional sum per status; the event and
+    # venue counts ride along as scalar subqueries in the same statement
+    def with_status(status: BookingStatus, value=1):
+        return func.coalesce(func.sum(case((BookingDB.status == status, value), else_=0)), 0)
     
-    cancelled_bookings = db.query(func.count(BookingDB.id)).filter(
-        BookingDB.status == BookingStatus.CANCELLED
-    ).scalar() or 0
+    (
+        total_bookings,
+        total_events,
+        total_venues,
+        total_revenue,
+        confirmed_bookings,
+        pending_bookings,
+        cancelled_bookings
+    ) = (await db.execute(
+        select(
+            func.count(BookingDB.id),
+            select(func.count(EventDB.id)).scalar_subquery(),
+            select(func.count(VenueDB.id)).scalar_subquery(),
+            with_status(BookingStatus.CONFIRMED, BookingDB.total_amount),
+            with_status(BookingStatus.CONFIRMED),
+            with_status(BookingStatus.PENDING),
+            with_status(BookingStatus.CANCELLED)
+        )
+    )).one()
     
     return BookingStats(
         total_bookings=total_bookings,
@@ -629,33 +1446,182 @@ async def get_booking_stats(db: Session = Depends(get_db)):
         cancelled_bookings=cancelled_bookings
     )
 
-# Web UI route
+# Web UI routes
+DASHBOARD_PAGE_SIZE = 50  # table rows per page on the dashboard
+STATS_CACHE_TTL = 5  # seconds the dashboard reuses its statistics before recomputing them
+
+# The statistics scan every booking, so the dashboard fragment shares one
+# computation between all the page loads within STATS_CACHE_TTL
+stats_cache: Dict[str, object] = {}
+
+# Ask clients to revalidate every time; with an ETag that costs a 304 when nothing changed
+CACHE_HEADERS = {"Cache-Control": "no-cache"}
+
+def render_dashboard(request: Request, name: str, context: dict, next_cursor: Optional[int] = None) -> Response:
+    """Render a dashboard template with an ETag of the result, so a client
+    that already holds it gets an empty 304; `next_cursor` is sent as the
+    X-Next-Cursor header"""
+    body = templates.get_template(name).render(request=request, **context)
+    headers = {"ETag": f'"{hashlib.sha1(body.encode()).hexdigest()}"', **CACHE_HEADERS}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    # The browser revalidates each cached page or fragment with the one ETag it
+    # was served with, so an exact comparison is all the dashboard needs
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+async def dashboard_page(db: AsyncSession, query, id_column, cursor: Optional[int], newest_first: bool = False):
+    """One page of `query` in `id_column` order after the row whose id is
+    `cursor`, and the cursor for the next page (None on the last). Seeking
+    past the cursor through the primary key costs the same on every page."""
+    if cursor is not None:
+        query = query.where(id_column < cursor if newest_first else id_column > cursor)
+    rows = (await db.scalars(
+        query.order_by(id_column.desc() if newest_first else id_column).limit(DASHBOARD_PAGE_SIZE + 1)
+    )).all()
+    if len(rows) > DASHBOARD_PAGE_SIZE:
+        rows = rows[:DASHBOARD_PAGE_SIZE]
+        return rows, rows[-1].id
+    return rows, None
+
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db)):
-    """Main dashboard page"""
-    # Get all data for the dashboard
-    events = db.query(EventDB).all()
-    venues = db.query(VenueDB).all()
-    ticket_types = db.query(TicketTypeDB).all()
-    bookings = db.query(BookingDB).all()
-    
-    # Get statistics
-    stats = await get_booking_stats(db)
-    
-    return templates.TemplateResponse(
+async def home(request: Request, db: AsyncSession = Depends(get_db)):
+    """Main dashboard page: the first page of bookings and the choices for
+    the forms. The statistics and the other tabs are fragments the page
+    fetches once it has rendered, so its cost does not grow with the bookings."""
+    bookings, next_cursor = await dashboard_page(
+        db, select(BookingDB).options(*BOOKING_DETAILS), BookingDB.id, None, newest_first=True
+    )
+    # Only the columns the form choices show, without building ORM objects
+    events = (await db.execute(select(EventDB.id, EventDB.name).order_by(EventDB.date, EventDB.id))).all()
+    venues = (await db.execute(select(VenueDB.id, VenueDB.name, VenueDB.capacity).order_by(VenueDB.name))).all()
+    ticket_types = (await db.execute(
+        select(TicketTypeDB.id, TicketTypeDB.name, TicketTypeDB.price).order_by(TicketTypeDB.id)
+    )).all()
+    
+    return render_dashboard(
+        request,
         "index.html",
         {
-            "request": request,
             "events": events,
             "venues": venues,
             "ticket_types": ticket_types,
             "bookings": bookings,
-            "stats": stats,
+            "next_cursor": next_cursor,
             "BookingStatus": BookingStatus,
             "TicketTypeEnum": TicketTypeEnum
         }
     )
 
+@app.get("/dashboard/stats", response_class=HTMLResponse)
+async def dashboard_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    """Statistics cards and booking status overview, up to STATS_CACHE_TTL
+    seconds old"""
+    if time.monotonic() - stats_cache.get("computed_at", float("-inf")) > STATS_CACHE_TTL:
+        stats_cache["stats"] = await get_booking_stats(db)
+        stats_cache["computed_at"] = time.monotonic()
+    return render_dashboard(request, "_stats.html", {"stats": stats_cache["stats"]})
+
+@app.get("/dashboard/bookings", response_class=HTMLResponse)
+async def dashboard_bookings(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bookings table rows, newest first"""
+    bookings, next_cursor = await dashboard_page(
+        db, select(BookingDB).options(*BOOKING_DETAILS), BookingDB.id, cursor, newest_first=True
+    )
+    return render_dashboard(request, "_booking_rows.html", {"bookings": bookings}, next_cursor)
+
+@app.get("/dashboard/events", response_class=HTMLResponse)
+async def dashboard_events(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Events table rows, with the seats held read from the inventory"""
+    events, next_cursor = await dashboard_page(db, select(EventDB).options(*EVENT_DETAILS), EventDB.id, cursor)
+    seats = {
+        event_id: (reserved, capacity)
+        for event_id, reserved, capacity in await db.execute(
+            select(EventInventoryDB.event_id, EventInventoryDB.reserved, EventInventoryDB.capacity)
+            .where(EventInventoryDB.event_id.in_([event.id for event in events]))
+        )
+    }
+    return render_dashboard(request, "_event_rows.html", {"events": events, "seats": seats}, next_cursor)
+
+@app.get("/dashboard/venues", response_class=HTMLResponse)
+async def dashboard_venues(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Venues table rows, with how many events each hosts"""
+    venues, next_cursor = await dashboard_page(db, select(VenueDB), VenueDB.id, cursor)
+    event_counts = dict((await db.execute(
+        select(EventDB.venue_id, func.count(EventDB.id))
+        .where(EventDB.venue_id.in_([venue.id for venue in venues]))
+        .group_by(EventDB.venue_id)
+    )).all())
+    return render_dashboard(request, "_venue_rows.html", {"venues": venues, "event_counts": event_counts}, next_cursor)
+
+@app.get("/dashboard/ticket-types", response_class=HTMLResponse)
+async def dashboard_ticket_types(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Ticket types table rows, with the seats held across all events read
+    from the inventory"""
+    ticket_types, next_cursor = await dashboard_page(db, select(TicketTypeDB), TicketTypeDB.id, cursor)
+    seats_held = dict((await db.execute(
+        select(TicketInventoryDB.ticket_type_id, func.sum(TicketInventoryDB.reserved))
+        .where(TicketInventoryDB.ticket_type_id.in_([ticket_type.id for ticket_type in ticket_types]))
+        .group_by(TicketInventoryDB.ticket_type_id)
+    )).all())
+    return render_dashboard(
+        request, "_ticket_type_rows.html", {"ticket_types": ticket_types, "seats_held": seats_held}, next_cursor
+    )
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ticket Booking System")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="serve",
+        choices=["serve", "init-db", "check-inventory", "rebuild-search-index"],
+        help="serve (default) runs the web app; init-db creates or migrates the database; "
+             "check-inventory compares the seat inventory with the bookings; "
+             "rebuild-search-index re-indexes bookings for search. "
+             "Checks and benchmarks are in bench.py"
+    )
+    parser.add_argument("--rebuild", action="store_true", help="check-inventory: rebuild the inventory from the bookings if it disagrees")
+    args = parser.parse_args()
+    
+    if args.command != "serve":
+        with sync_engine.begin() as connection:
+            prepared = prepare_database(connection)
+    
+    if args.command == "init-db":
+        print(f"Database initialized at schema version {SCHEMA_VERSION}" if prepared else "Database is up to date")
+    elif args.command == "check-inventory":
+        with sync_engine.begin() as connection:
+            problems = inventory_drift(connection)
+            for problem in problems:
+                print(f"Inventory drift - {problem}")
+            if problems and args.rebuild:
+                rebuild_inventory(connection)
+                print("Inventory rebuilt from bookings")
+            elif problems:
+                sys.exit(1)
+            else:
+                print("Inventory matches bookings")
+    elif args.command == "rebuild-search-index":
+        with sync_engine.begin() as connection:
+            rebuild_search_index(connection)
+        print("Search index rebuilt!")
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)